@@ -0,0 +1,5 @@
+import sys
+
+from pocketbase.cli import main
+
+sys.exit(main())
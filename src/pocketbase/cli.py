@@ -0,0 +1,251 @@
+"""
+Command line tool to export and import the records of a collection.
+
+Usage:
+    python -m pocketbase export posts -o posts.ndjson --checkpoint posts.ckpt
+    python -m pocketbase import posts -i posts.csv --batch-size 50 --concurrency 4
+
+The server url and superuser credentials are read from `--url`, `--email` and `--password` or the `POCKETBASE_URL`,
+`POCKETBASE_EMAIL` and `POCKETBASE_PASSWORD` environment variables.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from time import monotonic
+from typing import IO, Any
+
+from pocketbase.client import PocketBase
+from pocketbase.models.dtos import Record
+from pocketbase.models.errors import PocketBaseError
+from pocketbase.models.options import IterateOptions
+from pocketbase.utils.filter import format_filter
+from pocketbase.utils.types import BodyDict
+
+# Fields set by the server that are not sent back on import
+_READONLY_FIELDS = ("collectionId", "collectionName", "expand")
+
+
+class Throughput:
+    """Counts processed rows and reports the rate to stderr at most every `interval` seconds."""
+
+    def __init__(self, action: str, interval: float = 5.0, rows: int = 0) -> None:
+        self.action = action
+        self.interval = interval
+        self.rows = rows
+        self.failed = 0
+        self._start = self._reported = monotonic()
+        self._initial = rows
+
+    def add(self, rows: int, failed: int = 0) -> None:
+        self.rows += rows
+        self.failed += failed
+        if monotonic() - self._reported >= self.interval:
+            self.report()
+
+    def report(self) -> None:
+        self._reported = monotonic()
+        elapsed = self._reported - self._start
+        rate = (self.rows - self._initial) / elapsed if elapsed > 0 else 0.0
+        failed = f", {self.failed} failed" if self.failed else ""
+        print(f"{self.action} {self.rows} rows{failed} in {elapsed:.1f}s ({rate:.0f} rows/s)", file=sys.stderr)
+
+
+def load_checkpoint(path: Path | None) -> dict[str, Any]:
+    if path is None or not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_checkpoint(path: Path | None, state: dict[str, Any]) -> None:
+    if path is None:
+        return
+    # Write to a temporary file first so an interrupted write never corrupts the checkpoint
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_text(json.dumps(state))
+    temporary.replace(path)
+
+
+@contextmanager
+def open_file(path: str, mode: str) -> Iterator[IO[str]]:
+    if path == "-":
+        yield sys.stdout if "w" in mode or "a" in mode else sys.stdin
+        return
+    with Path(path).open(mode, newline="", encoding="utf-8") as file:
+        yield file
+
+
+def file_format(path: str, explicit: str | None) -> str:
+    if explicit:
+        return explicit
+    return "csv" if path.endswith(".csv") else "ndjson"
+
+
+def csv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    elif isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def parse_csv_value(value: str) -> Any:
+    # Lists and objects were written as JSON, everything else is left for the server to convert
+    if value[:1] in ("[", "{"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+
+async def export_collection(pb: PocketBase, args: argparse.Namespace) -> int:
+    checkpoint_path = Path(args.checkpoint) if args.checkpoint else None
+    checkpoint = load_checkpoint(checkpoint_path)
+    fmt = file_format(args.output, args.format)
+
+    options: IterateOptions = {"batch": args.batch, "cursor": "id"}
+    fields = args.fields.split(",") if args.fields else None
+    if fields:
+        # Paging and the checkpoint need the id, even when it is not exported
+        options["params"] = {"fields": ",".join(dict.fromkeys([*fields, "id"]))}
+
+    expression = args.filter
+    if "last_id" in checkpoint:
+        after = format_filter("id > {:id}", {"id": checkpoint["last_id"]})
+        expression = f"({expression}) && {after}" if expression else after
+    if expression:
+        options["filter"] = expression
+
+    stats = Throughput("exported", args.interval, checkpoint.get("rows", 0))
+    header = fields or checkpoint.get("header")
+
+    with open_file(args.output, "a" if checkpoint else "w") as output:
+        async for records in pb.collection(args.collection).iterate_pages(options):
+            if fmt == "csv":
+                header = header or list(records[0])
+                write_csv(output, header, records, write_header=stats.rows == 0)
+            else:
+                exported: list[Any] = (
+                    records if not fields or "id" in fields else [_without_id(record) for record in records]
+                )
+                output.writelines(pb._inners.codec.dumps(record).decode() + "\n" for record in exported)
+
+            output.flush()
+            stats.add(len(records))
+            save_checkpoint(checkpoint_path, {"last_id": records[-1]["id"], "rows": stats.rows, "header": header})
+
+    stats.report()
+    return 0
+
+
+def _without_id(record: Record) -> dict[str, Any]:
+    return {key: value for key, value in record.items() if key != "id"}
+
+
+def write_csv(output: IO[str], header: list[str], records: list[Record], write_header: bool) -> None:
+    writer = csv.writer(output)
+    if write_header:
+        writer.writerow(header)
+    writer.writerows([csv_value(record.get(field)) for field in header] for record in records)
+
+
+def read_rows(source: IO[str], fmt: str) -> Iterator[dict[str, Any]]:
+    if fmt == "csv":
+        for row in csv.DictReader(source):
+            yield {key: parse_csv_value(value) for key, value in row.items() if key}
+        return
+
+    for line in source:
+        if line.strip():
+            yield json.loads(line)
+
+
+def import_rows(rows: Iterator[dict[str, Any]], skip: int) -> Iterator[BodyDict]:
+    for row in islice(rows, skip, None):
+        yield {key: value for key, value in row.items() if key not in _READONLY_FIELDS}
+
+
+async def import_collection(pb: PocketBase, args: argparse.Namespace) -> int:
+    checkpoint_path = Path(args.checkpoint) if args.checkpoint else None
+    skip = load_checkpoint(checkpoint_path).get("rows", 0)
+    stats = Throughput("imported", args.interval, skip)
+
+    def progress(done: int) -> None:
+        stats.add(skip + done - stats.rows)
+        save_checkpoint(checkpoint_path, {"rows": skip + done})
+
+    with open_file(args.input, "r") as source:
+        result = await pb.collection(args.collection).bulk_create(
+            import_rows(read_rows(source, file_format(args.input, args.format)), skip),
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            progress=progress,
+            upsert=args.upsert,
+        )
+
+    for failure in result["failed"]:
+        print(f"Row {skip + failure['index'] + 1} failed: {failure['error']}", file=sys.stderr)
+
+    stats.rows -= len(result["failed"])
+    stats.failed = len(result["failed"])
+    stats.report()
+    return 1 if result["failed"] else 0
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m pocketbase", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--url", default=os.environ.get("POCKETBASE_URL", "http://127.0.0.1:8090"))
+    parser.add_argument("--email", default=os.environ.get("POCKETBASE_EMAIL"))
+    parser.add_argument("--password", default=os.environ.get("POCKETBASE_PASSWORD"))
+    parser.add_argument("--auth-collection", default="_superusers", help="collection to authenticate with")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between progress reports")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write the records of a collection to a file")
+    export.add_argument("collection")
+    export.add_argument("-o", "--output", default="-", help="file to write, - for stdout")
+    export.add_argument("--format", choices=["ndjson", "csv"], help="by default based on the file extension")
+    export.add_argument("--filter", help="only export the records matching this filter")
+    export.add_argument("--fields", help="comma separated fields to export")
+    export.add_argument("--batch", type=int, default=500, help="records per request")
+    export.add_argument("--checkpoint", help="file to store progress in, an interrupted export resumes from it")
+
+    load = commands.add_parser("import", help="create records in a collection from a file")
+    load.add_argument("collection")
+    load.add_argument("-i", "--input", default="-", help="file to read, - for stdin")
+    load.add_argument("--format", choices=["ndjson", "csv"], help="by default based on the file extension")
+    load.add_argument("--batch-size", type=int, default=1, help="records per batch request (requires batch api)")
+    load.add_argument("--concurrency", type=int, default=4, help="requests in flight")
+    load.add_argument("--upsert", action="store_true", help="update records with an existing id (requires batch api)")
+    load.add_argument("--checkpoint", help="file to store progress in, an interrupted import resumes from it")
+
+    return parser
+
+
+async def run(args: argparse.Namespace, pb: PocketBase | None = None) -> int:
+    pb = pb or PocketBase(args.url)
+
+    if args.email and args.password:
+        await pb.collection(args.auth_collection).auth.with_password(args.email, args.password)
+
+    if args.command == "export":
+        return await export_collection(pb, args)
+    return await import_collection(pb, args)
+
+
+def main(argv: list[str] | None = None) -> int:
+    try:
+        return asyncio.run(run(parser().parse_args(argv)))
+    except PocketBaseError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
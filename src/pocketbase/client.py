@@ -1,7 +1,14 @@
-from httpx import AsyncClient, Request, Response
+import asyncio
+from collections.abc import Hashable
+from typing import Any, TypeVar, overload
 
-from pocketbase.services.authorization import AuthStore
+from httpx import AsyncClient, AsyncHTTPTransport, Limits, Request, Response, Timeout
+
+from pocketbase.models.dtos import AuthResult, Record
+from pocketbase.models.options import RateLimitOptions, RetryOptions, TransportOptions
+from pocketbase.services.authorization import AuthIdentity, AuthStore, current_auth
 from pocketbase.services.backup import BackupService
+from pocketbase.services.batch import BatchService
 from pocketbase.services.collection import CollectionService
 from pocketbase.services.file import FileService
 from pocketbase.services.health import HealthService
@@ -9,22 +16,140 @@ from pocketbase.services.log import LogService
 from pocketbase.services.realtime import RealtimeService
 from pocketbase.services.record import RecordService
 from pocketbase.services.settings import SettingsService
+from pocketbase.utils.codec import JsonCodec, default_codec
+from pocketbase.utils.ratelimit import RouteLimiter
+from pocketbase.utils.retry import RetryPolicy
+
+_R = TypeVar("_R")
 
 
 class PocketBaseInners:
-    auth: AuthStore
     client: AsyncClient
+    realtime_timeout: float | None
+    realtime_debounce: float
+    realtime_max_topics: int
+    realtime_backoff: float
+    realtime_max_backoff: float
+    inflight: dict[Hashable, asyncio.Task] | None
+    retry: RetryPolicy | None
+    limiter: RouteLimiter | None
+    codec: JsonCodec
+
+    def __init__(
+        self,
+        pocketbase: "PocketBase",
+        base_url: str,
+        *,
+        transport: TransportOptions | None = None,
+        coalesce_requests: bool = False,
+        auto_refresh: bool = False,
+        retry: RetryOptions | None = None,
+        rate_limits: dict[str, RateLimitOptions] | None = None,
+        codec: JsonCodec | None = None,
+    ) -> None:
+        self._auth = AuthStore(pocketbase, self, auto_refresh)
+        self._auto_refresh = auto_refresh
+        self.inflight = {} if coalesce_requests else None
+        self.retry = RetryPolicy(retry) if retry is not None else None
+        self.limiter = RouteLimiter(rate_limits) if rate_limits else None
+        self.codec = codec or default_codec()
+        self.realtime_timeout = transport.get("realtime_timeout", 900) if transport else 900
+        self.realtime_debounce = transport.get("realtime_debounce", 0.01) if transport else 0.01
+        self.realtime_max_topics = transport.get("realtime_max_topics", 1000) if transport else 1000
+        self.realtime_backoff = transport.get("realtime_backoff", 0.5) if transport else 0.5
+        self.realtime_max_backoff = transport.get("realtime_max_backoff", 30.0) if transport else 30.0
+
+        if not transport:
+            self.client = AsyncClient(base_url=base_url)
+        else:
+            self.client = self._build_client(base_url, transport, transport.get("max_connections", 100))
+
+        self._realtime_client: AsyncClient | None = None
+        if transport and "realtime_max_connections" in transport:
+            self._realtime_client = self._build_client(base_url, transport, transport["realtime_max_connections"])
+
+    @property
+    def auth(self) -> AuthStore:
+        auth = current_auth.get()
+        return auth if auth is not None and auth._in is self else self._auth
+
+    @auth.setter
+    def auth(self, auth: AuthStore) -> None:
+        self._auth = auth
 
-    def __init__(self, pocketbase: "PocketBase", base_url: str) -> None:
-        self.auth = AuthStore(pocketbase, self)
-        self.client = AsyncClient(base_url=base_url)
+    @property
+    def realtime_client(self) -> AsyncClient:
+        return self._realtime_client or self.client
+
+    @staticmethod
+    def _build_client(base_url: str, transport: TransportOptions, max_connections: int | None) -> AsyncClient:
+        limits = Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=transport.get("max_keepalive_connections", 20),
+            keepalive_expiry=transport.get("keepalive_expiry", 5.0),
+        )
+        timeout = Timeout(
+            transport.get("timeout", 5.0), connect=transport.get("connect_timeout", transport.get("timeout", 5.0))
+        )
+
+        return AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            transport=AsyncHTTPTransport(limits=limits, http2=transport.get("http2", False), uds=transport.get("uds")),
+        )
 
 
 class PocketBase:
     _inner_cls_: type[PocketBaseInners] = PocketBaseInners
 
-    def __init__(self, base_url: str) -> None:
-        self._inners = self._inner_cls_(self, base_url)
+    def __init__(
+        self,
+        base_url: str,
+        transport: TransportOptions | None = None,
+        coalesce_requests: bool = False,
+        auto_refresh: bool = False,
+        retry: RetryOptions | None = None,
+        rate_limits: dict[str, RateLimitOptions] | None = None,
+        codec: JsonCodec | None = None,
+    ) -> None:
+        """
+        Args:
+            base_url: The url of the PocketBase server, also used for the Host header when connecting over `uds`.
+            transport: Connection pool, timeout, HTTP/2 (requires the `h2` package) and unix socket settings. The
+                realtime connection shares the pool unless `realtime_max_connections` gives it its own.
+                Subscription changes within `realtime_debounce` seconds are sent to the server together. Topics
+                are spread over as many realtime connections as needed to stay under `realtime_max_topics` each.
+                A lost realtime connection is re-established after a jittered exponential backoff between 0 and
+                `realtime_backoff` seconds, doubling per attempt up to `realtime_max_backoff`.
+            coalesce_requests: Let identical GET requests (same url, params, headers and auth token) that are in
+                flight at the same time share one request. All callers then receive the same decoded result, which
+                must not be modified.
+            auto_refresh: Refresh the auth token in the background ahead of its expiry, instead of on the first
+                request after it nears expiry.
+            retry: Retry failed requests with jittered exponential backoff (or as long as `Retry-After` says) and
+                stop sending requests for a while after repeated server failures. By default GET, PUT and DELETE
+                requests are retried on transport errors and 429/502/503/504 responses, pass `retry=True` in
+                the options of a request to retry e.g. a POST. `{}` enables the defaults.
+            rate_limits: Client side limits per route, to stay under the server's rate limiter instead of
+                receiving 429 responses. Maps a path pattern (e.g. `/api/collections/*/records` or `/api/batch`,
+                which also matches the paths below it) to a `rate` in requests per second with an optional `burst`,
+                and/or the maximum `concurrency` of requests in flight. Realtime connections are not limited.
+            codec: The JSON codec for request bodies, responses and realtime events. Defaults to msgspec or orjson
+                when installed and the standard library otherwise.
+        """
+
+        settings: dict[str, Any] = {
+            "transport": transport,
+            "coalesce_requests": coalesce_requests,
+            "auto_refresh": auto_refresh,
+            "retry": retry,
+            "rate_limits": rate_limits,
+            "codec": codec,
+        }
+        # Only the settings that are used, so a subclass taking just `(pocketbase, base_url)` keeps working
+        self._inners = self._inner_cls_(
+            self, base_url, **{key: value for key, value in settings.items() if value not in (None, False)}
+        )
         self._collections_service: CollectionService = CollectionService(self, self._inners)
         self._file_service: FileService = FileService(self, self._inners)
         self._log_service: LogService = LogService(self, self._inners)
@@ -32,7 +157,7 @@ class PocketBase:
         self._health_service: HealthService = HealthService(self, self._inners)
         self._backup_service: BackupService = BackupService(self, self._inners)
         self._settings: SettingsService = SettingsService(self, self._inners)
-        self._collections: dict[str, RecordService] = {}
+        self._collections: dict[Hashable, RecordService[Any]] = {}
 
     def headers(self) -> dict[str, str]:
         return {"Accept-Language": "en-US"}
@@ -67,7 +192,46 @@ class PocketBase:
     def backups(self) -> BackupService:
         return self._backup_service
 
-    def collection(self, id_or_name: str) -> RecordService:
-        if id_or_name not in self._collections:
-            self._collections[id_or_name] = RecordService(self, self._inners, id_or_name)
-        return self._collections[id_or_name]
+    def as_user(self, auth: AuthResult | None = None) -> AuthIdentity:
+        """
+        Creates a handle to send requests as another user, sharing this client's connections and services.
+
+        Example:
+            alice = pb.as_user(await pb.collection("users").auth.with_password(email, password))
+            with alice:
+                await pb.collection("posts").get_list()
+
+        Args:
+            auth: The result of an earlier login, leave empty to log in inside the `with` block instead.
+        """
+
+        store = AuthStore(self, self._inners, self._inners._auto_refresh)
+        if auth:
+            store.set_user(auth)
+        return AuthIdentity(store)
+
+    def create_batch(self) -> BatchService:
+        return BatchService(self, self._inners)
+
+    @overload
+    def collection(self, id_or_name: str) -> RecordService[Record]: ...
+
+    @overload
+    def collection(self, id_or_name: str, record_type: type[_R]) -> RecordService[_R]: ...
+
+    def collection(self, id_or_name: str, record_type: type[_R] | None = None) -> RecordService[Any]:
+        """
+        Returns the service for the records of a collection.
+
+        Args:
+            id_or_name: The id or name of the collection.
+            record_type: Decode records into this type instead of dicts: a (slots) dataclass, e.g. generated with
+                `utils.records.record_type_from_collection`, or a msgspec Struct. With the msgspec codec (the default
+                when msgspec is installed) responses are decoded straight into it, other codecs build dicts first.
+                Realtime callbacks and auth responses still receive dicts.
+        """
+
+        key = id_or_name if record_type is None else (id_or_name, record_type)
+        if key not in self._collections:
+            self._collections[key] = RecordService(self, self._inners, id_or_name, record_type)
+        return self._collections[key]
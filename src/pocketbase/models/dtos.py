@@ -1,15 +1,20 @@
-from typing import Generic, Literal, NotRequired, TypedDict, TypeVar
+from typing import TYPE_CHECKING, Generic, Literal, NotRequired, TypedDict, TypeVar
 
 from pocketbase.utils.types import JsonType
 
+if TYPE_CHECKING:
+    from httpx import TransportError
+
+    from pocketbase.models.errors import PocketBaseError
+
 _T = TypeVar("_T")
 
 
 class ListResult(TypedDict, Generic[_T]):
     page: int
-    per_page: int
-    total_items: int
-    total_pages: int
+    perPage: int
+    totalItems: int
+    totalPages: int
     items: list[_T]
 
 
@@ -113,6 +118,38 @@ class OTPResult(TypedDict):
     otpId: str
 
 
+class BatchResult(TypedDict):
+    status: int
+    body: JsonType
+
+
+class BulkFailure(TypedDict):
+    index: int
+    error: "PocketBaseError | TransportError"
+
+
+class BulkResult(TypedDict):
+    created: int
+    failed: list[BulkFailure]
+    elapsed: float
+    rows_per_second: float
+
+
+class CacheStats(TypedDict):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+
+class SubscriptionStats(TypedDict):
+    topic: str
+    depth: int
+    lag: float
+    dropped: int
+    delivered: int
+
+
 class RealtimeEvent(TypedDict):
     action: Literal["create", "update", "delete"]
     record: Record
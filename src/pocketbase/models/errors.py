@@ -2,6 +2,8 @@ from typing import Any
 
 from httpx import Response
 
+from pocketbase.models.dtos import BatchResult
+
 
 class PocketBaseError(Exception):
     def __init__(self, url: str, status: int, data: Any) -> None:
@@ -16,18 +18,22 @@ class PocketBaseError(Exception):
 
     @classmethod
     def raise_for_status(cls, response: Response) -> None:
-        if response.status_code == 400:
-            raise PocketBaseBadRequestError(str(response.url), response.status_code, response.json())
-        elif response.status_code == 401:
-            raise PocketBaseUnauthorizedError(str(response.url), response.status_code, response.json())
-        elif response.status_code == 403:
-            raise PocketBaseForbiddenError(str(response.url), response.status_code, response.json())
-        elif response.status_code == 404:
-            raise PocketBaseNotFoundError(str(response.url), response.status_code, response.json())
-        elif response.status_code == 500:
-            raise PocketBaseServerError(str(response.url), response.status_code, response.json())
-        elif response.status_code >= 400:
-            raise PocketBaseError(str(response.url), response.status_code, response.json())
+        if response.status_code >= 400:
+            raise cls.from_status(str(response.url), response.status_code, response.json())
+
+    @classmethod
+    def from_status(cls, url: str, status: int, data: Any) -> "PocketBaseError":
+        if status == 400:
+            return PocketBaseBadRequestError(url, status, data)
+        elif status == 401:
+            return PocketBaseUnauthorizedError(url, status, data)
+        elif status == 403:
+            return PocketBaseForbiddenError(url, status, data)
+        elif status == 404:
+            return PocketBaseNotFoundError(url, status, data)
+        elif status == 500:
+            return PocketBaseServerError(url, status, data)
+        return PocketBaseError(url, status, data)
 
 
 class PocketBaseNotFoundError(PocketBaseError):
@@ -48,3 +54,16 @@ class PocketBaseForbiddenError(PocketBaseError):
 
 class PocketBaseServerError(PocketBaseError):
     pass
+
+
+class PocketBaseBatchError(PocketBaseBadRequestError):
+    def __init__(self, url: str, status: int, data: Any, errors: dict[int, PocketBaseError]) -> None:
+        super().__init__(url, status, data)
+        self.errors = errors
+        # Set by `BatchService.send`: the number of operations committed before the failing chunk, and their results
+        self.sent = 0
+        self.results: list[BatchResult] = []
+
+
+class PocketBaseCircuitOpenError(PocketBaseError):
+    pass
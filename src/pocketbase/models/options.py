@@ -1,7 +1,10 @@
+from collections.abc import Awaitable, Callable
 from typing import Literal, TypedDict
 
-from httpx._types import PrimitiveData
+from httpx._types import PrimitiveData, RequestContent
 
+from pocketbase.models.dtos import RealtimeEvent
+from pocketbase.utils.queue import Overflow
 from pocketbase.utils.types import BodyDict, SendableFiles
 
 
@@ -11,11 +14,16 @@ class SendOptions(TypedDict, total=False):
     body: BodyDict
     params: dict[str, PrimitiveData]
     files: SendableFiles
+    content: RequestContent
+    timeout: float | None
+    retry: bool
 
 
 class CommonOptions(TypedDict, total=False):
     headers: dict[str, str]
     params: dict[str, PrimitiveData]
+    timeout: float | None
+    retry: bool
 
 
 class ListOptions(CommonOptions, total=False):
@@ -25,6 +33,14 @@ class ListOptions(CommonOptions, total=False):
 
 class FullListOptions(ListOptions, total=False):
     batch: int
+    concurrency: int
+    cursor: str
+
+
+class IterateOptions(ListOptions, total=False):
+    batch: int
+    prefetch: int
+    cursor: str
 
 
 class FirstOptions(CommonOptions, total=False):
@@ -37,3 +53,53 @@ class LogStatsOptions(CommonOptions, total=False):
 
 class FileOptions(CommonOptions, total=False):
     thumb: str
+
+
+class BatchOptions(CommonOptions, total=False):
+    max_requests: int
+
+
+class TransportOptions(TypedDict, total=False):
+    max_connections: int | None
+    max_keepalive_connections: int | None
+    keepalive_expiry: float | None
+    http2: bool
+    uds: str
+    timeout: float | None
+    connect_timeout: float | None
+    realtime_timeout: float | None
+    realtime_max_connections: int
+    realtime_debounce: float
+    realtime_max_topics: int
+    realtime_backoff: float
+    realtime_max_backoff: float
+
+
+class RetryOptions(TypedDict, total=False):
+    retries: int
+    backoff: float
+    max_backoff: float
+    methods: list[str]
+    statuses: list[int]
+    circuit_failures: int
+    circuit_reset: float
+
+
+# Receives the newest `updated` value seen before the connection was lost, returns the events that were missed
+CatchUp = Callable[[str], Awaitable[list[RealtimeEvent]]]
+
+
+# When a subscription's queue is full, `drop_oldest` (the default) drops the oldest queued event and `conflate`
+# replaces a queued event for the same record. `block` loses nothing, but stalls the connection's reader, so
+# every subscription on that connection waits for the slowest callback.
+class SubscribeOptions(CommonOptions, total=False):
+    queue_size: int
+    overflow: Overflow
+    workers: int
+    catch_up: bool | CatchUp
+
+
+class RateLimitOptions(TypedDict, total=False):
+    rate: float
+    burst: int
+    concurrency: int
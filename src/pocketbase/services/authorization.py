@@ -1,6 +1,11 @@
+import asyncio
 import base64
 import json
+import logging
+from collections.abc import Hashable
+from contextvars import ContextVar, Token
 from datetime import UTC, datetime
+from types import TracebackType
 from typing import TYPE_CHECKING
 
 from httpx import Request
@@ -23,37 +28,117 @@ def get_token_payload(token: str | None) -> dict[str, JsonType]:
     return json.loads(jsondata)
 
 
+# Set while the refresh request itself is sent, so it does not try to refresh (and wait for) itself.
+_refreshing: ContextVar[bool] = ContextVar("pocketbase_auth_refreshing", default=False)
+# The auth store of the identity entered with `PocketBase.as_user`, see `PocketBaseInners.auth`.
+current_auth: ContextVar["AuthStore | None"] = ContextVar("pocketbase_current_auth", default=None)
+
+
 class AuthStore(Service):
     _expiration_threshold_ = 60.0
+    _auto_refresh_lead_ = 120.0
+    _auto_refresh_retry_ = 10.0
 
-    def __init__(self, pocketbase: "PocketBase", inners: "PocketBaseInners") -> None:
+    def __init__(self, pocketbase: "PocketBase", inners: "PocketBaseInners", auto_refresh: bool = False) -> None:
         super().__init__(pocketbase, inners)
         self._authority: Record | None = None
         self._token: str | None = None
         self._payload: dict[str, JsonType] = {}
-        self._refreshing: bool = False
+        self._refresh_lock = asyncio.Lock()
+        self._auto_refresh = auto_refresh
+        self._auto_refresh_task: asyncio.Task | None = None
+
+    @property
+    def token(self) -> str | None:
+        return self._token
+
+    @property
+    def identity(self) -> Hashable:
+        """A key identifying who is authenticated that, unlike the token, is stable across refreshes."""
+        if self._authority and "id" in self._authority:
+            return (self._authority.get("collectionId"), self._authority["id"])
+        return self._token
 
     def set_is_refreshing(self, refreshing: bool) -> None:
-        self._refreshing = refreshing
+        _refreshing.set(refreshing)
+
+    @property
+    def is_refreshing(self) -> bool:
+        """Whether the current request is a token refresh."""
+        return _refreshing.get()
+
+    async def ensure_fresh(self) -> None:
+        """Refreshes the token if it is about to expire."""
+        if self._token and not _refreshing.get() and self._is_token_expired() and self._authority:
+            await self._refresh(self._token)
 
     async def authorize(self, request: Request) -> None:
+        await self.ensure_fresh()
         if self._token:
-            if not self._refreshing and self._is_token_expired() and self._authority:
-                col: str = self._authority.get("collectionName", "users")
-                await self._pb.collection(col).auth.refresh()
-
             request.headers["Authorization"] = self._token
 
+    async def _refresh(self, token: str) -> None:
+        # Only one refresh runs at a time, callers that waited for it find the token already replaced.
+        async with self._refresh_lock:
+            if self._token == token and self._authority:
+                col: str = self._authority.get("collectionName", "users")
+                reset = current_auth.set(self)
+                try:
+                    await self._pb.collection(col).auth.refresh()
+                finally:
+                    current_auth.reset(reset)
+
     def set_user(self, model: AuthResult) -> None:
         self._authority = model.get("record", self._authority)
         self._token = model.get("token", self._token)
         self._payload = get_token_payload(self._token)
 
+        if self._auto_refresh:
+            self._schedule_auto_refresh()
+
     def clean(self) -> None:
         self._authority = None
         self._token = None
         self._payload = {}
 
+        if self._auto_refresh_task and self._auto_refresh_task is not asyncio.current_task():
+            self._auto_refresh_task.cancel()
+        self._auto_refresh_task = None
+
+    def _schedule_auto_refresh(self) -> None:
+        try:
+            current = asyncio.current_task()
+        except RuntimeError:
+            # No event loop running, the refresh happens on the first request instead.
+            return
+
+        if self._auto_refresh_task is current:
+            # Refreshed by the auto refresh loop itself, it will pick up the new token.
+            return
+
+        if self._auto_refresh_task:
+            self._auto_refresh_task.cancel()
+        self._auto_refresh_task = asyncio.create_task(self._auto_refresh_loop())
+
+    async def _auto_refresh_loop(self) -> None:
+        while self._token and self._authority:
+            exp = self._payload.get("exp")
+            if not isinstance(exp, float | int):
+                return
+
+            now = datetime.now(tz=UTC).timestamp()
+            if now > exp:
+                return
+
+            token = self._token
+            await asyncio.sleep(max(0.0, exp - now - self._auto_refresh_lead_))
+
+            try:
+                await self._refresh(token)
+            except Exception:
+                logging.exception("Refreshing the auth token ahead of expiry failed")
+                await asyncio.sleep(self._auto_refresh_retry_)
+
     def _is_token_expired(self) -> bool:
         exp = self._payload.get("exp")
         if exp and isinstance(exp, (float | int)):
@@ -61,3 +146,30 @@ class AuthStore(Service):
             if now > float(exp) - self._expiration_threshold_:
                 return True
         return False
+
+
+class AuthIdentity:
+    """
+    A lightweight handle to act as a specific user on a shared `PocketBase` client, see `PocketBase.as_user`.
+
+    Requests made inside `with identity:` (and tasks started from there) are sent with this identity's token,
+    logins inside it set this identity. The connection pool and services stay shared. So does the realtime
+    connection, whose subscriptions are authorized as the identity that last changed them.
+    """
+
+    def __init__(self, store: AuthStore) -> None:
+        self._store = store
+        self._resets: list[Token[AuthStore | None]] = []
+
+    @property
+    def store(self) -> AuthStore:
+        return self._store
+
+    def __enter__(self) -> "AuthIdentity":
+        self._resets.append(current_auth.set(self._store))
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        current_auth.reset(self._resets.pop())
@@ -1,6 +1,12 @@
+import asyncio
+import secrets
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
+from pathlib import Path
 from typing import TypeAlias, TypedDict, cast
 from urllib.parse import quote
+from zipfile import BadZipFile, ZipFile
 
+from httpx import TransportError
 from httpx._types import FileTypes
 
 from pocketbase.models.errors import PocketBaseError
@@ -8,6 +14,8 @@ from pocketbase.models.options import CommonOptions, SendOptions
 from pocketbase.services.base import Service
 
 ZipFileName: TypeAlias = str
+Progress: TypeAlias = Callable[[int, int | None], None]
+Sink: TypeAlias = Callable[[bytes], Awaitable[None]]
 
 
 class BackupFileInfo(TypedDict):
@@ -62,22 +70,193 @@ class BackupService(Service):
 
         await self._send_noreturn(f"/{quote(key)}", send_options)
 
-    async def download(self, key: ZipFileName, options: CommonOptions | None = None) -> bytes:
+    async def upload_stream(
+        self,
+        key: ZipFileName,
+        source: AsyncIterable[bytes] | str | Path,
+        size: int | None = None,
+        progress: Progress | None = None,
+        options: CommonOptions | None = None,
+        chunk_size: int = 1024 * 1024,
+    ) -> None:
+        """
+        Uploads a backup from a file path or an async iterator of bytes, without loading it into memory.
+
+        Args:
+            key: The name of the uploaded backup.
+            source: A path to read the backup from, or an async iterable producing its bytes.
+            size: The size of the backup in bytes, determined automatically for paths.
+            progress: Called with the number of bytes sent so far and the total size (if known) after every chunk.
+            options: Additional options for the upload (optional).
+            chunk_size: The size of the chunks read from a path.
+        """
+
+        if isinstance(source, str | Path):
+            size = Path(source).stat().st_size
+            source = self._read_chunks(Path(source), chunk_size)
+
+        boundary = secrets.token_hex(16)
+        filename = key.replace('"', "%22")
+        head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            "Content-Type: application/zip\r\n\r\n"
+        ).encode()
+        tail = f"\r\n--{boundary}--\r\n".encode()
+
+        async def content() -> AsyncIterator[bytes]:
+            sent = 0
+            yield head
+            async for chunk in source:
+                sent += len(chunk)
+                yield chunk
+                if progress:
+                    progress(sent, size)
+            yield tail
+
+        send_options: SendOptions = {"method": "POST"}
+
+        if options:
+            send_options.update(options)
+            send_options["params"] = send_options.get("params", {}).copy()
+
+        send_options["headers"] = {
+            **send_options.get("headers", {}),
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+        }
+        if size is not None:
+            send_options["headers"]["Content-Length"] = str(len(head) + size + len(tail))
+        send_options["content"] = content()
+
+        await self._send_noreturn("/upload", send_options)
+
+    @staticmethod
+    async def _read_chunks(path: Path, chunk_size: int) -> AsyncIterator[bytes]:
+        with path.open("rb") as file:
+            # Read in a thread, so a slow disk does not block the event loop
+            while chunk := await asyncio.to_thread(file.read, chunk_size):
+                yield chunk
+
+    async def _download_options(self, options: CommonOptions | None) -> SendOptions:
         send_options: SendOptions = {"method": "GET"}
 
         if options:
             send_options.update(options)
             send_options["params"] = send_options.get("params", {}).copy()
 
-        send_options["params"] = send_options.get("params", {})
-        send_options["params"]["token"] = await self._pb.files.get_token()
+        return await self._prepare_download(send_options)
 
-        response = await self._send_raw(f"/{quote(key)}", send_options)
+    async def _prepare_download(self, options: SendOptions) -> SendOptions:
+        # File tokens are short-lived, so every (resumed) request of a long download gets a new one
+        return {**options, "params": {**options.get("params", {}), "token": await self._pb.files.get_token()}}
+
+    async def download(self, key: ZipFileName, options: CommonOptions | None = None) -> bytes:
+        response = await self._send_raw(f"/{quote(key)}", await self._download_options(options))
 
         PocketBaseError.raise_for_status(response)
 
         return response.content
 
+    async def stream(
+        self, key: ZipFileName, options: CommonOptions | None = None, chunk_size: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """Downloads a backup as an async iterator of chunks."""
+
+        async with self._stream_raw(f"/{quote(key)}", await self._download_options(options)) as response:
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
+    async def download_to(
+        self,
+        key: ZipFileName,
+        target: str | Path | Sink,
+        options: CommonOptions | None = None,
+        resume: bool = False,
+        retries: int = 3,
+        verify: bool = True,
+    ) -> int:
+        """
+        Downloads a backup to a path or an async sink without loading it into memory.
+
+        Args:
+            key: The name of the backup.
+            target: A path to write the backup to, or an async callable that is awaited with every chunk.
+            options: Additional options for the download (optional).
+            resume: If the path already holds part of this same backup, only download the remainder. The existing
+                content is not checked, so only use this for an earlier, interrupted download.
+            retries: How often an interrupted transfer is resumed with an HTTP Range request before giving up.
+            verify: Check the downloaded size against the backup listing, and for paths the zip checksums.
+
+        Returns:
+            The size of the downloaded backup in bytes.
+
+        Raises:
+            PocketBaseError: If the download fails or does not pass verification.
+        """
+
+        url = f"/{quote(key)}"
+        send_options: SendOptions = {"method": "GET"}
+
+        if options:
+            send_options.update(options)
+            send_options["params"] = send_options.get("params", {}).copy()
+
+        if isinstance(target, str | Path):
+            size = await self._download_to(url, send_options, Path(target), resume, 1, retries)
+        else:
+            size = await self._download_to_sink(url, send_options, target, retries)
+
+        if verify:
+            await self._verify(key, size, target if isinstance(target, str | Path) else None)
+
+        return size
+
+    async def _download_to_sink(self, url: str, options: SendOptions, sink: Sink, retries: int) -> int:
+        position = 0
+
+        for attempt in range(retries + 1):
+            send_options = await self._prepare_download({**options, "headers": {**options.get("headers", {})}})
+            if position:
+                send_options["headers"]["Range"] = f"bytes={position}-"
+
+            try:
+                async with self._stream_raw(url, send_options) as response:
+                    if position and response.status_code != 206:
+                        raise PocketBaseError(
+                            str(response.url), response.status_code, "Range requests are not supported"
+                        )
+
+                    async for chunk in response.aiter_bytes():
+                        await sink(chunk)
+                        position += len(chunk)
+                break
+            except TransportError:
+                if attempt == retries:
+                    raise
+
+        return position
+
+    @staticmethod
+    def _test_zip(path: Path) -> str | None:
+        with ZipFile(path) as zipfile:
+            return zipfile.testzip()
+
+    async def _verify(self, key: ZipFileName, size: int, path: str | Path | None) -> None:
+        url = self._build_url(f"/{quote(key)}")
+        info = next((backup for backup in await self.get_full_list() if backup["key"] == key), None)
+
+        if info is not None and info["size"] != size:
+            raise PocketBaseError(url, 200, f"Downloaded {size} bytes but the backup is {info['size']} bytes")
+
+        if path is not None:
+            try:
+                corrupt = await asyncio.to_thread(self._test_zip, Path(path))
+            except BadZipFile as e:
+                raise PocketBaseError(url, 200, "Downloaded backup is not a valid zip file") from e
+
+            if corrupt is not None:
+                raise PocketBaseError(url, 200, f"Checksum mismatch in downloaded backup for {corrupt}")
+
     async def restore(self, key: ZipFileName, options: CommonOptions | None = None) -> None:
         send_options: SendOptions = {"method": "POST"}
 
@@ -1,10 +1,16 @@
-from typing import TYPE_CHECKING
+import asyncio
+from collections.abc import AsyncIterator, Hashable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
+from itertools import pairwise
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, cast
 
-from httpx import Request, Response
+from httpx import USE_CLIENT_DEFAULT, Request, Response, TransportError
 
 from pocketbase.models.errors import PocketBaseError
 from pocketbase.models.options import SendOptions
-from pocketbase.utils.types import JsonType, SendableFiles, transform
+from pocketbase.utils.retry import RetryPolicy
+from pocketbase.utils.types import FileUpload, JsonType, SendableFiles, transform
 
 if TYPE_CHECKING:
     from pocketbase.client import PocketBase, PocketBaseInners
@@ -17,26 +23,133 @@ class Service:
         self._pb = pocketbase
         self._in = inners
 
-    async def _send_raw(self, path: str, options: SendOptions) -> Response:
+    async def _prepare_send(self, path: str, options: SendOptions) -> Request:
         request = self._init_send(path, options)
         await self._in.auth.authorize(request)
 
         if self._pb.before_send != self._pb.__class__.before_send:
             request = (await self._pb.before_send(request)) or request
 
-        response = await self._in.client.send(request)
+        return request
 
+    async def _finish_send(self, response: Response) -> Response:
         if self._pb.after_send != self._pb.__class__.after_send:
             response = (await self._pb.after_send(response)) or response
 
         return response
 
+    async def _send_raw(self, path: str, options: SendOptions) -> Response:
+        # Refreshed before taking a slot, the refresh request may need a slot on the same route
+        await self._in.auth.ensure_fresh()
+        async with self._limit_slot(path):
+            if self._in.retry is None:
+                return await self._send_once(path, options, stream=False)
+            return await self._send_retrying(self._in.retry, path, options, stream=False)
+
+    @asynccontextmanager
+    async def _stream_raw(self, path: str, options: SendOptions) -> AsyncIterator[Response]:
+        # The concurrency slot is held until the response body has been consumed
+        await self._in.auth.ensure_fresh()
+        async with self._limit_slot(path):
+            if self._in.retry is None:
+                response = await self._send_once(path, options, stream=True)
+            else:
+                response = await self._send_retrying(self._in.retry, path, options, stream=True)
+
+            try:
+                if response.status_code >= 400:
+                    await response.aread()
+                    PocketBaseError.raise_for_status(response)
+
+                yield response
+            finally:
+                await response.aclose()
+
+    def _limit_slot(self, path: str) -> AbstractAsyncContextManager[None]:
+        # A refresh can be started by a request that holds a slot (e.g. when retried), it must not wait for one
+        if self._in.limiter is None or self._in.auth.is_refreshing:
+            return nullcontext()
+        return self._in.limiter.slot(self._build_url(path))
+
+    async def _send_once(self, path: str, options: SendOptions, stream: bool) -> Response:
+        if self._in.limiter is not None:
+            await self._in.limiter.throttle(self._build_url(path))
+
+        request = await self._prepare_send(path, options)
+        response = await self._in.client.send(request, stream=stream)
+
+        try:
+            return await self._finish_send(response)
+        except BaseException:
+            await response.aclose()
+            raise
+
+    async def _send_retrying(self, policy: RetryPolicy, path: str, options: SendOptions, stream: bool) -> Response:
+        retries = policy.attempts(options)
+        attempt = 0
+
+        while True:
+            policy.check(self._build_url(path))
+
+            try:
+                response = await self._send_once(path, options, stream)
+            except TransportError:
+                policy.record(healthy=False)
+                if attempt >= retries:
+                    raise
+                await asyncio.sleep(policy.delay(attempt))
+            else:
+                policy.record(healthy=response.status_code < 500)
+                if attempt >= retries or response.status_code not in policy.statuses:
+                    return response
+                await response.aclose()
+                await asyncio.sleep(policy.delay(attempt, response.headers.get("Retry-After")))
+
+            attempt += 1
+
     async def _send(self, path: str, options: SendOptions) -> JsonType:
+        return cast(JsonType, await self._send_as(path, options, None))
+
+    async def _send_as(self, path: str, options: SendOptions, decode_as: Any) -> Any:
+        if self._in.inflight is not None and options.get("method", "GET") == "GET":
+            return await self._send_coalesced(self._in.inflight, path, options, decode_as)
+
+        return await self._send_decoded(path, options, decode_as)
+
+    async def _send_coalesced(
+        self, inflight: dict[Hashable, asyncio.Task], path: str, options: SendOptions, decode_as: Any
+    ) -> Any:
+        key = (
+            self._build_url(path),
+            tuple(sorted((k, str(v)) for k, v in options.get("params", {}).items())),
+            tuple(sorted(options.get("headers", {}).items())),
+            self._in.auth.token,
+            decode_as,
+        )
+        task = inflight.get(key)
+
+        if task is None:
+            task = asyncio.create_task(self._send_decoded(path, options, decode_as))
+            inflight[key] = task
+            task.add_done_callback(lambda t: self._coalesced_done(inflight, key, t))
+
+        # Shielded so a cancelled caller does not cancel the request for the others
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _coalesced_done(inflight: dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task) -> None:
+        if inflight.get(key) is task:
+            del inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case all callers were cancelled
+            task.exception()
+
+    async def _send_decoded(self, path: str, options: SendOptions, decode_as: Any = None) -> Any:
         response = await self._send_raw(path, options)
         PocketBaseError.raise_for_status(response)
 
         try:
-            return response.json()
+            return self._in.codec.loads(response.content, decode_as)
         except ValueError as e:
             raise PocketBaseError(str(response.url), response.status_code, "PocketBase returned invalid JSON") from e
 
@@ -44,6 +157,102 @@ class Service:
         response = await self._send_raw(path, options)
         PocketBaseError.raise_for_status(response)
 
+    async def _download_to(
+        self, path: str, options: SendOptions, target: Path, resume: bool, parts: int, retries: int
+    ) -> int:
+        offset = target.stat().st_size if resume and parts == 1 and target.exists() else 0
+        total = await self._content_length(path, options) if offset or parts > 1 else None
+
+        if total is not None and parts > 1:
+            with target.open("wb") as file:
+                file.truncate(total)
+
+            bounds = [total * part // parts for part in range(parts + 1)]
+            await asyncio.gather(
+                *(
+                    self._download_range(path, options, target, start, end, retries)
+                    for start, end in pairwise(bounds)
+                    if start < end
+                )
+            )
+            return total
+
+        if total is not None and offset == total:
+            return total
+
+        if total is None or offset > total:
+            target.write_bytes(b"")
+            offset = 0
+
+        return await self._download_range(path, options, target, offset, None, retries)
+
+    async def _download_range(
+        self, path: str, options: SendOptions, target: Path, start: int, end: int | None, retries: int
+    ) -> int:
+        # The ETag or Last-Modified of the first response, so a resumed transfer notices when the file changed
+        validators: dict[str, str] = {}
+
+        with target.open("r+b") as file:
+            file.seek(start)
+
+            for attempt in range(retries + 1):
+                try:
+                    await self._stream_range(path, options, file, end, validators)
+                    break
+                except TransportError:
+                    if attempt == retries:
+                        raise
+
+            if end is None:
+                file.truncate()
+
+            return file.tell()
+
+    async def _prepare_download(self, options: SendOptions) -> SendOptions:
+        """Called for every request of `_download_to`, e.g. to add a fresh token."""
+        return options
+
+    async def _stream_range(
+        self, path: str, options: SendOptions, file: IO[bytes], end: int | None, validators: dict[str, str]
+    ) -> None:
+        send_options = await self._prepare_download({**options, "headers": {**options.get("headers", {})}})
+        position = file.tell()
+
+        if position or end is not None:
+            send_options["headers"]["Range"] = f"bytes={position}-{'' if end is None else end - 1}"
+            send_options["headers"].update(validators)
+
+        async with self._stream_raw(path, send_options) as response:
+            etag = response.headers.get("ETag", "")
+            # If-Range only accepts strong validators
+            validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified")
+            if validator:
+                validators["If-Range"] = validator
+
+            if "Range" in send_options["headers"] and response.status_code != 206:
+                if end is not None:
+                    message = "Range requests are not supported"
+                    if "If-Range" in send_options["headers"]:
+                        message = "The file changed during the download"
+                    raise PocketBaseError(str(response.url), response.status_code, message)
+                # The server ignored the range or the file changed, it sends the whole file
+                file.seek(0)
+
+            async for chunk in response.aiter_bytes():
+                file.write(chunk)
+
+    async def _content_length(self, path: str, options: SendOptions) -> int | None:
+        send_options = await self._prepare_download(
+            {**options, "headers": {**options.get("headers", {}), "Range": "bytes=0-0"}}
+        )
+
+        async with self._stream_raw(path, send_options) as response:
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code == 206 and content_range.rpartition("/")[2].isdigit():
+                return int(content_range.rpartition("/")[2])
+
+        return None
+
     def _init_send(self, path: str, options: SendOptions) -> Request:
         headers = self._pb.headers()
 
@@ -53,27 +262,26 @@ class Service:
         headers["accept"] = "application/json"
 
         body = options.get("body")
+        content = options.get("content")
         data: dict[str, JsonType] | None = None
         files: SendableFiles | None = options.get("files")
-        if body and files is None:
-            data, files = transform(body)
-            if not files:
-                files = None
-                data = None
-            else:
-                body = None
-        elif body and files is not None:
-            data, sfiles = transform(body)
-            files.extend(sfiles)
+        if body and files is None and not any(isinstance(v, FileUpload) and v.files for v in body.values()):
+            content = self._in.codec.dumps(body)
+            headers["Content-Type"] = "application/json"
+        elif body:
+            # Copied, the files are moved out of the dict and a retried request needs them again
+            data, sfiles = transform(dict(body))
+            files = [*(files or []), *sfiles]
 
         return self._in.client.build_request(
             url=self._build_url(path),
             method=options.get("method", "GET"),
-            json=body,
+            content=content,
             data=data,
             files=files,  # type: ignore
             params=options.get("params"),
             headers=headers,
+            timeout=options.get("timeout", USE_CLIENT_DEFAULT),
         )
 
     def _build_url(self, path: str) -> str:
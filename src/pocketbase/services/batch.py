@@ -0,0 +1,172 @@
+from typing import TYPE_CHECKING, Any, NotRequired, TypedDict
+from urllib.parse import quote, urlencode
+
+from pocketbase.models.dtos import BatchResult
+from pocketbase.models.errors import PocketBaseBadRequestError, PocketBaseBatchError, PocketBaseError
+from pocketbase.models.options import BatchOptions, CommonOptions, SendOptions
+from pocketbase.services.base import Service
+from pocketbase.utils.types import BodyDict, SendableFiles, split_files
+
+if TYPE_CHECKING:
+    from pocketbase.client import PocketBase, PocketBaseInners
+
+
+class _BatchRequest(TypedDict):
+    method: str
+    url: str
+    headers: NotRequired[dict[str, str]]
+    body: NotRequired[BodyDict]
+
+
+class BatchService(Service):
+    """
+    Queues record operations and sends them to the server as one transactional request.
+
+    Operations are queued through `collection(...)` and are only sent on `send()`. Queues larger
+    than `max_requests` are split over multiple requests, each of which is its own transaction.
+    """
+
+    __base_sub_path__ = "/api/batch"
+
+    def __init__(self, pocketbase: "PocketBase", inners: "PocketBaseInners") -> None:
+        super().__init__(pocketbase, inners)
+        self._requests: list[_BatchRequest] = []
+        self._files: list[SendableFiles] = []
+        self._collections: dict[str, SubBatchService] = {}
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def collection(self, id_or_name: str) -> "SubBatchService":
+        if id_or_name not in self._collections:
+            self._collections[id_or_name] = SubBatchService(self, id_or_name)
+        return self._collections[id_or_name]
+
+    def _queue(self, method: str, url: str, body: BodyDict | None = None, options: CommonOptions | None = None) -> int:
+        if options and options.get("params"):
+            url += "?" + urlencode(options["params"])
+
+        request: _BatchRequest = {"method": method, "url": url}
+        files: SendableFiles = []
+
+        if options and options.get("headers"):
+            request["headers"] = options["headers"]
+
+        if body is not None:
+            request["body"], files = split_files(dict(body))
+
+        self._requests.append(request)
+        self._files.append(files)
+        return len(self._requests) - 1
+
+    async def send(self, options: BatchOptions | None = None) -> list[BatchResult]:
+        """
+        Sends all queued operations and clears the queue.
+
+        Args:
+            options: Additional options for the batch request, `max_requests` sets the chunk size (default 50).
+
+        Returns:
+            The result of each queued operation, in queue order.
+
+        Raises:
+            PocketBaseBatchError: If an operation failed, `errors` maps the index in the queue as it was when
+                `send` was called to the error of that operation.
+
+        Whatever error sending a chunk raises, the chunks sent before it are committed and removed from the queue,
+        so sending again does not repeat them. The error then has `sent`, the number of committed operations (the
+        queue index `i` of `errors` is at `i - sent` in the remaining queue), and `results`, their results.
+        """
+
+        max_requests = options.get("max_requests", 50) if options else 50
+        results: list[BatchResult] = []
+
+        for offset in range(0, len(self._requests), max_requests):
+            try:
+                results.extend(await self._send_chunk(offset, offset + max_requests, options))
+            except BaseException as e:
+                del self._requests[:offset]
+                del self._files[:offset]
+                if isinstance(e, Exception):
+                    e.sent, e.results = offset, results  # type: ignore[attr-defined]
+                raise
+
+        self._requests = []
+        self._files = []
+        return results
+
+    async def _send_chunk(self, start: int, end: int, options: BatchOptions | None) -> list[BatchResult]:
+        requests = self._requests[start:end]
+        files: SendableFiles = [
+            (f"requests.{index}.{field[0]}", field[1])
+            for index, request_files in enumerate(self._files[start:end])
+            for field in request_files
+        ]
+
+        send_options: SendOptions = {"method": "POST"}
+
+        if files:
+            send_options["body"] = {"@jsonPayload": self._in.codec.dumps({"requests": requests}).decode()}
+            send_options["files"] = files
+        else:
+            send_options["body"] = {"requests": requests}  # type: ignore
+
+        if options:
+            send_options["headers"] = options.get("headers", {})
+            send_options["params"] = options.get("params", {}).copy()
+
+        try:
+            return await self._send("", send_options)  # type: ignore
+        except PocketBaseBadRequestError as e:
+            errors = self._request_errors(e.data, requests, start)
+            if not errors:
+                raise
+            raise PocketBaseBatchError(e.url, e.status, e.data, errors) from e
+
+    @staticmethod
+    def _request_errors(data: Any, requests: list[_BatchRequest], offset: int) -> dict[int, PocketBaseError]:
+        failed = data.get("data", {}).get("requests") if isinstance(data, dict) else None
+        errors: dict[int, PocketBaseError] = {}
+
+        if not isinstance(failed, dict):
+            return errors
+
+        for key, value in failed.items():
+            if not key.isdigit() or int(key) >= len(requests):
+                continue
+
+            response = value.get("response") if isinstance(value, dict) else None
+            if isinstance(response, dict):
+                status, body = response.get("status", 400), response.get("body", response)
+            else:
+                status, body = 400, value
+
+            errors[offset + int(key)] = PocketBaseError.from_status(requests[int(key)]["url"], status, body)
+
+        return errors
+
+
+class SubBatchService:
+    def __init__(self, batch: BatchService, collection: str) -> None:
+        self._batch = batch
+        self._collection = collection
+        self.__base_sub_path__ = f"/api/collections/{quote(collection)}/records"
+
+    def create(self, params: BodyDict, options: CommonOptions | None = None) -> int:
+        """Queues a record create, returns the index of the operation in the batch."""
+        if "password" in params and "passwordConfirm" not in params:
+            params["passwordConfirm"] = params["password"]
+
+        return self._batch._queue("POST", self.__base_sub_path__, params, options)
+
+    def upsert(self, params: BodyDict, options: CommonOptions | None = None) -> int:
+        """Queues a record upsert (update if `params["id"]` exists, create otherwise)."""
+        return self._batch._queue("PUT", self.__base_sub_path__, params, options)
+
+    def update(self, record_id: str, params: BodyDict, options: CommonOptions | None = None) -> int:
+        """Queues a record update, returns the index of the operation in the batch."""
+        return self._batch._queue("PATCH", f"{self.__base_sub_path__}/{quote(record_id)}", params, options)
+
+    def delete(self, record_id: str, options: CommonOptions | None = None) -> int:
+        """Queues a record delete, returns the index of the operation in the batch."""
+        return self._batch._queue("DELETE", f"{self.__base_sub_path__}/{quote(record_id)}", None, options)
@@ -1,16 +1,33 @@
-from typing import Generic, TypeVar
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any, Generic, TypeVar
 from urllib.parse import quote
 
 from pocketbase.models.dtos import ListResult
 from pocketbase.models.errors import PocketBaseNotFoundError
-from pocketbase.models.options import CommonOptions, FirstOptions, FullListOptions, ListOptions, SendOptions
+from pocketbase.models.options import (
+    CommonOptions,
+    FirstOptions,
+    FullListOptions,
+    IterateOptions,
+    ListOptions,
+    SendOptions,
+)
 from pocketbase.services.base import Service
+from pocketbase.utils.filter import keyset_filter
 from pocketbase.utils.types import BodyDict
 
 _T = TypeVar("_T")
 
 
 class CrudService(Service, Generic[_T]):
+    # The type responses are decoded into instead of dicts, see `PocketBase.collection`
+    _record_type: Any = None
+
+    def _list_type(self) -> Any:
+        return None if self._record_type is None else ListResult[self._record_type]  # type: ignore
+
     async def get_list(
         self,
         page: int = 1,
@@ -34,16 +51,37 @@ class CrudService(Service, Generic[_T]):
             send_options["params"]["sort"] = options["sort"]  # type: ignore
             del send_options["sort"]  # type: ignore
 
-        return await self._send("", send_options)  # type: ignore
+        return await self._send_as("", send_options, self._list_type())
 
     async def get_full_list(self, options: FullListOptions | None = None) -> list[_T]:
+        """
+        Fetches all records matching the options, `batch` records per request.
+
+        With `concurrency` above 1 the first page is fetched together with the total count and the remaining
+        pages are fetched with at most `concurrency` requests in flight. Records created or deleted while the
+        pages are being fetched can shift the page boundaries.
+
+        With `cursor` set to a unique sort key (e.g. `"id"` or `"-created,id"`) records are paged by filtering on
+        the last seen key instead of by page number, see `iterate_pages`.
+        """
+
+        if options and "cursor" in options:
+            if options.get("concurrency", 1) > 1:
+                raise ValueError("Cursor pagination cannot fetch pages concurrently")
+            return [item async for items in self.iterate_pages(options) for item in items]  # type: ignore
+
         list_options: ListOptions = {}
         batch = options.get("batch", 500) if options else 500
+        concurrency = options.get("concurrency", 1) if options else 1
 
         if options:
             list_options.update(options)
 
         list_options["params"] = list_options.get("params", {}).copy()
+
+        if concurrency > 1:
+            return await self._get_full_list_concurrent(batch, concurrency, list_options)
+
         list_options["params"]["skipTotal"] = 1
 
         page = 1
@@ -57,6 +95,103 @@ class CrudService(Service, Generic[_T]):
 
         return items
 
+    async def _get_full_list_concurrent(self, batch: int, concurrency: int, options: ListOptions) -> list[_T]:
+        first = await self.get_list(1, batch, options)
+
+        options["params"] = options.get("params", {}).copy()
+        options["params"]["skipTotal"] = 1
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(page: int) -> list[_T]:
+            async with semaphore:
+                return (await self.get_list(page, batch, options))["items"]
+
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(fetch(page)) for page in range(2, first["totalPages"] + 1)]
+
+        # A copy, the first page may be shared with coalesced callers
+        items = [*first["items"]]
+        for task in tasks:
+            items.extend(task.result())
+
+        return items
+
+    async def iterate_pages(self, options: IterateOptions | None = None) -> AsyncIterator[list[_T]]:
+        """
+        Iterates over all records matching the options, one page of `batch` records at a time.
+
+        While the caller processes a page the next `prefetch` pages (default 1) are already being fetched,
+        so at most `prefetch + 1` pages are held in memory.
+
+        With `cursor` set to a comma separated, unique sort key (e.g. `"id"` or `"-created,id"`) the records are
+        sorted by that key and each page is requested with a filter on the key of the last record seen. Every page
+        then costs the same to the server and concurrent inserts or deletes cannot make records be skipped or
+        repeated. Pages are not prefetched in this mode and the key fields must be present in the returned records.
+        """
+
+        list_options: ListOptions = {}
+        batch = options.get("batch", 500) if options else 500
+        prefetch = options.get("prefetch", 1) if options else 1
+
+        if options:
+            list_options.update(options)
+
+        list_options["params"] = list_options.get("params", {}).copy()
+        list_options["params"]["skipTotal"] = 1
+
+        if options and "cursor" in options:
+            async for items in self._iterate_keyset(batch, options["cursor"], list_options):
+                yield items
+            return
+
+        pending: deque[asyncio.Task[ListResult[_T]]] = deque()
+        page = 1
+
+        try:
+            while True:
+                while len(pending) <= prefetch:
+                    pending.append(asyncio.create_task(self.get_list(page, batch, list_options)))
+                    page += 1
+
+                items = (await pending.popleft())["items"]
+
+                if items:
+                    yield items
+
+                if len(items) < batch:
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _iterate_keyset(self, batch: int, cursor: str, options: ListOptions) -> AsyncIterator[list[_T]]:
+        sort = [key.strip() for key in cursor.split(",") if key.strip()]
+        base_filter = options.get("filter")
+
+        if options.get("sort", cursor) != cursor:
+            raise ValueError("Cursor pagination sorts by the cursor, do not pass a different sort")
+
+        options["sort"] = ",".join(sort)
+
+        while True:
+            items = (await self.get_list(1, batch, options))["items"]
+
+            if items:
+                yield items
+
+            if len(items) < batch:
+                return
+
+            condition = keyset_filter(sort, items[-1])
+            options["filter"] = f"({base_filter}) && ({condition})" if base_filter else condition
+
+    async def iterate(self, options: IterateOptions | None = None) -> AsyncIterator[_T]:
+        """Iterates over all records matching the options, see `iterate_pages`."""
+        async for items in self.iterate_pages(options):
+            for item in items:
+                yield item
+
     async def get_first(self, options: FirstOptions | None = None) -> _T:
         list_options: ListOptions = {}
 
@@ -81,7 +216,7 @@ class CrudService(Service, Generic[_T]):
             send_options.update(options)
             send_options["params"] = send_options.get("params", {}).copy()
 
-        return await self._send(f"/{quote(record_id)}", send_options)  # type: ignore
+        return await self._send_as(f"/{quote(record_id)}", send_options, self._record_type)
 
     async def create(self, params: BodyDict, options: CommonOptions | None = None) -> _T:
         if "password" in params and "passwordConfirm" not in params:
@@ -93,7 +228,7 @@ class CrudService(Service, Generic[_T]):
             send_options.update(options)
             send_options["params"] = send_options.get("params", {}).copy()
 
-        return await self._send("", send_options)  # type: ignore
+        return await self._send_as("", send_options, self._record_type)
 
     async def update(self, record_id: str, params: BodyDict, options: CommonOptions | None = None) -> _T:
         send_options: SendOptions = {"method": "PATCH", "body": params}
@@ -102,7 +237,7 @@ class CrudService(Service, Generic[_T]):
             send_options.update(options)
             send_options["params"] = send_options.get("params", {}).copy()
 
-        return await self._send(f"/{quote(record_id)}", send_options)  # type: ignore
+        return await self._send_as(f"/{quote(record_id)}", send_options, self._record_type)
 
     async def delete(self, record_id: str, options: CommonOptions | None = None) -> None:
         send_options: SendOptions = {"method": "DELETE"}
@@ -1,3 +1,5 @@
+from collections.abc import AsyncIterator
+from pathlib import Path
 from urllib.parse import quote
 
 from pocketbase.models.options import CommonOptions, FileOptions, SendOptions
@@ -10,10 +12,7 @@ class FileService(Service):
     def get_url(self, collection: str, record_id: str, filename: str) -> str:
         return self._build_url(f"/{quote(collection)}/{quote(record_id)}/{filename}")
 
-    async def download_file(
-        self, collection: str, record_id: str, filename: str, options: FileOptions | None = None
-    ) -> bytes:
-        url = f"/{quote(collection)}/{quote(record_id)}/{filename}"
+    def _file_options(self, options: FileOptions | None) -> SendOptions:
         send_options: SendOptions = {"method": "GET", "params": {"download": True}}
         if options and "params" in options:
             send_options["params"].update(options["params"])
@@ -24,7 +23,71 @@ class FileService(Service):
         if options and "thumb" in options:
             send_options["params"]["thumb"] = options["thumb"]
 
-        return (await self._send_raw(url, send_options)).content
+        if options and "timeout" in options:
+            send_options["timeout"] = options["timeout"]
+
+        return send_options
+
+    async def download_file(
+        self, collection: str, record_id: str, filename: str, options: FileOptions | None = None
+    ) -> bytes:
+        url = f"/{quote(collection)}/{quote(record_id)}/{filename}"
+        return (await self._send_raw(url, self._file_options(options))).content
+
+    async def stream_file(
+        self,
+        collection: str,
+        record_id: str,
+        filename: str,
+        options: FileOptions | None = None,
+        chunk_size: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Downloads a file as an async iterator of chunks, without holding the whole file in memory.
+
+        Raises:
+            PocketBaseError: If the server responds with an error status.
+        """
+
+        url = f"/{quote(collection)}/{quote(record_id)}/{filename}"
+
+        async with self._stream_raw(url, self._file_options(options)) as response:
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
+    async def download_to(
+        self,
+        collection: str,
+        record_id: str,
+        filename: str,
+        path: str | Path,
+        options: FileOptions | None = None,
+        resume: bool = False,
+        parts: int = 1,
+        retries: int = 3,
+    ) -> int:
+        """
+        Downloads a file to `path`, writing it incrementally.
+
+        Args:
+            collection: The collection id or name of the record.
+            record_id: The id of the record the file belongs to.
+            filename: The name of the file.
+            path: Where to write the file.
+            options: Additional options for the download (optional).
+            resume: If `path` already holds part of this same file, only request the remainder with an HTTP Range
+                request. The existing content is not checked, so only use this for an earlier, interrupted download.
+                Transfers interrupted within one call are always resumed, and restarted if the file changed.
+            parts: Split the download in this many ranged requests that are fetched in parallel. Parallel downloads
+                always start from scratch.
+            retries: How often an interrupted transfer is resumed before giving up.
+
+        Returns:
+            The size of the downloaded file in bytes.
+        """
+
+        url = f"/{quote(collection)}/{quote(record_id)}/{filename}"
+        return await self._download_to(url, self._file_options(options), Path(path), resume, parts, retries)
 
     async def get_token(self, options: CommonOptions | None = None) -> str:
         send_options: SendOptions = {"method": "POST"}
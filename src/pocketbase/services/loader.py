@@ -0,0 +1,128 @@
+import asyncio
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Generic, TypeVar
+from urllib.parse import quote
+
+from pocketbase.models.errors import PocketBaseNotFoundError
+from pocketbase.models.options import CommonOptions, ListOptions
+from pocketbase.utils.filter import format_filter
+from pocketbase.utils.records import get_field
+
+if TYPE_CHECKING:
+    from pocketbase.services.record import RecordService
+
+_R = TypeVar("_R")
+
+
+class RecordLoader(Generic[_R]):
+    """
+    Batches `load` calls made within the same event loop iteration (or `window` seconds) into `get_list` requests.
+
+    Use `RecordService.loader` to create one. Each request filters on at most `max_batch` ids and keeps the
+    url-encoded filter under `max_filter_length` characters.
+    """
+
+    def __init__(
+        self,
+        service: "RecordService[_R]",
+        options: CommonOptions | None = None,
+        window: float = 0.0,
+        max_batch: int = 500,
+        max_filter_length: int = 4000,
+    ) -> None:
+        self._service = service
+        self._options = options
+        self._window = window
+        self._max_batch = max_batch
+        self._max_filter_length = max_filter_length
+        self._pending: dict[str, list[asyncio.Future[_R]]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, record_id: str) -> _R:
+        """
+        Loads a record by id, like `RecordService.get_one`.
+
+        Raises:
+            PocketBaseNotFoundError: If no record with this id exists or it is not visible to the current auth.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        if not self._pending:
+            if self._window > 0:
+                loop.call_later(self._window, self._dispatch)
+            else:
+                loop.call_soon(self._dispatch)
+
+        future: asyncio.Future[_R] = loop.create_future()
+        self._pending.setdefault(record_id, []).append(future)
+        return await future
+
+    async def load_many(self, record_ids: Sequence[str]) -> list[_R]:
+        return list(await asyncio.gather(*(self.load(record_id) for record_id in record_ids)))
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        chunk: list[str] = []
+        length = 0
+
+        for record_id in pending:
+            clause = quote(format_filter("id={:id}", {"id": record_id}) + "||")
+            if chunk and (len(chunk) >= self._max_batch or length + len(clause) > self._max_filter_length):
+                self._start_fetch({i: pending[i] for i in chunk})
+                chunk, length = [], 0
+            chunk.append(record_id)
+            length += len(clause)
+
+        if chunk:
+            self._start_fetch({i: pending[i] for i in chunk})
+
+    def _start_fetch(self, waiters: dict[str, list[asyncio.Future[_R]]]) -> None:
+        task = asyncio.create_task(self._fetch(waiters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, waiters: dict[str, list[asyncio.Future[_R]]]) -> None:
+        try:
+            records = await self._load(list(waiters))
+        except Exception as e:
+            self._fail(waiters, e)
+            return
+        except BaseException:
+            # Cancelled, the callers must not wait forever
+            self._fail(waiters, asyncio.CancelledError())
+            raise
+
+        for record_id, futures in waiters.items():
+            for future in futures:
+                if future.done():
+                    continue
+                elif record_id in records:
+                    future.set_result(records[record_id])
+                else:
+                    future.set_exception(
+                        PocketBaseNotFoundError(
+                            url=self._service._build_url(f"/{quote(record_id)}"),
+                            status=404,
+                            data={"code": 404, "message": "The requested resource wasn't found.", "data": {}},
+                        )
+                    )
+
+    async def _load(self, record_ids: list[str]) -> dict[str, _R]:
+        options: ListOptions = {**(self._options or {})}
+        params = {**options.get("params", {}), "skipTotal": 1}
+        if params.get("fields") and params["fields"] != "*":
+            # Records are matched to the callers by id
+            params["fields"] = ",".join(dict.fromkeys([*str(params["fields"]).split(","), "id"]))
+        options["params"] = params
+        options["filter"] = "||".join(format_filter("id={:id}", {"id": record_id}) for record_id in record_ids)
+
+        result = await self._service.get_list(1, len(record_ids), options)
+        return {get_field(record, "id"): record for record in result["items"]}
+
+    @staticmethod
+    def _fail(waiters: dict[str, list[asyncio.Future[_R]]], error: BaseException) -> None:
+        for futures in waiters.values():
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
@@ -3,17 +3,23 @@ import json
 import logging
 from asyncio.tasks import Task
 from collections import defaultdict
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Coroutine, Iterable, Mapping
 from contextlib import suppress
+from datetime import UTC, datetime
+from types import TracebackType
 from typing import TYPE_CHECKING, Any
 from urllib.parse import quote
 
-from httpx import ReadError, RemoteProtocolError
+from httpx import ConnectError, ConnectTimeout, TransportError
 from httpx_sse import aconnect_sse
 
-from pocketbase.models.dtos import RealtimeEvent
-from pocketbase.models.options import CommonOptions
+from pocketbase.models.dtos import RealtimeEvent, SubscriptionStats
+from pocketbase.models.errors import PocketBaseError
+from pocketbase.models.options import SubscribeOptions
 from pocketbase.services.base import Service
+from pocketbase.utils.queue import EventQueue, QueueClosed
+from pocketbase.utils.retry import RetryPolicy
+from pocketbase.utils.types import format_datetime
 
 if TYPE_CHECKING:
     from pocketbase.client import PocketBase, PocketBaseInners
@@ -22,103 +28,560 @@ if TYPE_CHECKING:
 Callback = Callable[[RealtimeEvent], Awaitable[None]]
 
 
-class RealtimeService(Service):
-    __base_sub_path__ = "/api/realtime"
+class Subscription:
+    """
+    A single `subscribe` call: a bounded queue of events and the worker tasks that pass them to the callback.
 
-    def __init__(self, pocketbase: "PocketBase", inners: "PocketBaseInners") -> None:
-        super().__init__(pocketbase, inners)
+    A slow callback only fills its own queue, see `SubscribeOptions` for what happens when it is full (with
+    `block`, the whole connection waits). Without a callback there are no workers and the events are pulled from
+    the queue by an `EventStream`.
+
+    With a `catch_up` hook, live events are held back after a reconnect until the events returned by the hook,
+    for the changes since the newest `updated` value seen, are queued. Until an event with `updated` is seen, the
+    time of subscribing on the client's clock is used instead, so changes can be missed if it runs ahead.
+    """
+
+    def __init__(self, topic: str, callback: Callback | None, options: SubscribeOptions | None = None) -> None:
+        options = options or {}
+        self.topic = topic
+        self.queue: EventQueue[RealtimeEvent] = EventQueue(
+            options.get("queue_size", 1000), options.get("overflow", "drop_oldest")
+        )
+        self.delivered = 0
+        catch_up = options.get("catch_up")
+        self.catch_up = catch_up if callable(catch_up) else None
+        # The newest `updated` value seen, the client's clock (in PocketBase's format) until there is one
+        self.since: str | None = None
+        self._started = format_datetime(datetime.now(UTC)).replace("T", " ")
+        self._held: list[RealtimeEvent] | None = None
+        self._held_since = self._started
+        self._workers = []
+        if callback is not None:
+            self._workers = [asyncio.create_task(self._work(callback)) for _ in range(options.get("workers", 1))]
+
+    @property
+    def stats(self) -> SubscriptionStats:
+        return {
+            "topic": self.topic,
+            "depth": len(self.queue),
+            "lag": self.queue.lag,
+            "dropped": self.queue.dropped,
+            "delivered": self.delivered,
+        }
+
+    async def put(self, event: RealtimeEvent) -> None:
+        record = event.get("record")
+        if isinstance(record, dict):
+            updated = record.get("updated")
+            if isinstance(updated, str) and (self.since is None or updated > self.since):
+                self.since = updated
+
+        if self._held is not None:
+            self._held.append(event)
+        else:
+            await self._enqueue(event)
+
+    def hold(self) -> None:
+        """Holds back live events until `resume`, if there is a `catch_up` hook. Called before resubscribing."""
+        if self.catch_up is not None and self._held is None:
+            self._held = []
+            self._held_since = self.since or self._started
+
+    async def resume(self) -> None:
+        """Queues the events from the `catch_up` hook, then the live events held back in the meantime."""
+        if self.catch_up is None or self._held is None:
+            return
+
+        try:
+            events = await self.catch_up(self._held_since)
+        except Exception:
+            logging.exception("Unhandled exception in realtime catch-up")
+            events = []
+
+        for event in events:
+            await self._enqueue(event)
+
+        while self._held:
+            await self._enqueue(self._held.pop(0))
+        self._held = None
+
+    async def _enqueue(self, event: RealtimeEvent) -> None:
+        record = event.get("record")
+        await self.queue.put(event, record.get("id") if isinstance(record, dict) else None)
+
+    async def stop(self) -> None:
+        self.queue.close()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def _work(self, callback: Callback) -> None:
+        while True:
+            event = await self.queue.get()
+            try:
+                await callback(event)
+            except Exception:
+                # We never want any exception to break the realtime handler.
+                logging.exception("Unhandled exception in realtime event handler")
+            self.delivered += 1
+
+
+class EventStream:
+    """
+    Pull-based alternative to a callback: an async iterator over the events of one topic.
+
+    The subscription is made when iteration starts (or the stream is entered with `async with`) and ended with
+    `close`. Events wait in a bounded queue until they are taken, see `SubscribeOptions` for what happens when it is
+    full. Iteration ends once the stream is closed.
+
+    Example:
+        async with pb.collection("orders").events(filter="status = 'paid'") as events:
+            async for event in events:
+                ...
+    """
+
+    def __init__(self, realtime: "RealtimeService", topic: str, options: SubscribeOptions | None = None) -> None:
+        self._realtime = realtime
+        self._topic = topic
+        self._options = options
+        self._subscription: Subscription | None = None
+        self._unsubscribe: Callable[[], Awaitable[None]] | None = None
+        self._closed = False
+
+    async def open(self) -> None:
+        """Subscribes to the topic, if that did not happen yet."""
+        if self._unsubscribe is None and not self._closed:
+            (self._subscription,), self._unsubscribe = await self._realtime._add_subscriptions(
+                [(self._topic, None)], self._options
+            )
+
+    async def close(self) -> None:
+        """Ends the subscription, events still queued are discarded."""
+        self._closed = True
+        if self._unsubscribe is not None:
+            await self._unsubscribe()
+
+    async def __aenter__(self) -> "EventStream":
+        await self.open()
+        return self
+
+    async def __aexit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        await self.close()
+
+    def __aiter__(self) -> "EventStream":
+        return self
+
+    async def __anext__(self) -> RealtimeEvent:
+        await self.open()
+        if self._subscription is None or self._closed:
+            raise StopAsyncIteration
+        try:
+            event = await self._subscription.queue.get()
+        except QueueClosed:
+            raise StopAsyncIteration from None
+        self._subscription.delivered += 1
+        return event
+
+    async def batch(self, max_events: int, timeout: float | None = None) -> list[RealtimeEvent]:
+        """
+        Waits for at least one event and returns it together with all events already queued, up to `max_events`.
+
+        Args:
+            max_events: The maximum number of events to return.
+            timeout: Seconds to wait for the first event, after which an empty list is returned (optional).
+
+        Returns:
+            The events in the order they were received, an empty list if the stream is closed.
+        """
+
+        try:
+            async with asyncio.timeout(timeout):
+                events = [await self.__anext__()]
+        except (TimeoutError, StopAsyncIteration):
+            return []
+
+        assert self._subscription is not None
+        while len(events) < max_events:
+            try:
+                events.append(self._subscription.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        self._subscription.delivered += len(events) - 1
+        return events
+
+
+class RealtimeConnection:
+    """One SSE connection with its own client id, subscribed to its share of the topics of a `RealtimeService`."""
+
+    def __init__(self, service: "RealtimeService") -> None:
+        self.topics: set[str] = set()
+        self.client_id: str | None = None
+        self._service = service
         self._last_transmit: set[str] = set()
-        self._subscriptions: dict[str, list[Callback]] = defaultdict(list)
-        self._client_id: str | None = None
-        self._connection: Task | None = None
+        self._task: Task | None = None
 
-    async def _ensure_connection(self) -> None:
-        if self._connection and not self._connection.done():
-            # Already running
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Connects and waits until the topics are transmitted, or connecting failed."""
+        if self.running:
             return
 
         sentinel = asyncio.Event()
-        self._connection = asyncio.create_task(self._make_connection(sentinel))
+        task = self._task = asyncio.create_task(self._run(sentinel))
         await sentinel.wait()
+        if task.done() and not task.cancelled() and (error := task.exception()) is not None:
+            self._task = None
+            raise error
+
+    async def transmit(self, force: bool = False) -> None:
+        to_transmit = set(self.topics)
+        if not force and (to_transmit == self._last_transmit or not self.client_id):
+            return
 
-    async def _make_connection(self, sentinel: asyncio.Event) -> None:
+        self._last_transmit = to_transmit
+
+        await self._service._send_noreturn(
+            "", {"method": "POST", "body": {"clientId": self.client_id, "subscriptions": list(to_transmit)}}
+        )
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _on_connect(self, client_id: str, reconnect: bool) -> None:
+        self.client_id = client_id
+        if not reconnect:
+            await self.transmit(force=True)
+            return
+
+        # Events from before the resubscribe were missed, hold the live ones back until they are caught up on
+        subscriptions = [s for topic in self.topics for s in self._service._subscriptions.get(topic, ())]
+        for subscription in subscriptions:
+            subscription.hold()
+
+        try:
+            await self.transmit(force=True)
+        finally:
+            for subscription in subscriptions:
+                self._service._spawn(subscription.resume())
+        self._service._notify_reconnect()
+
+    async def _run(self, sentinel: asyncio.Event) -> None:
+        service = self._service
         headers: dict[str, Any] = {}
         last_event_id: Any | None = None
+        connected = False
+        attempt = 0
         try:
             while True:
                 try:
                     async with aconnect_sse(
-                        self._in.client, "GET", self.__base_sub_path__, headers=headers, timeout=900
+                        service._in.realtime_client,
+                        "GET",
+                        service.__base_sub_path__,
+                        headers=headers,
+                        timeout=service._in.realtime_timeout,
                     ) as sse:
                         async for message in sse.aiter_sse():
                             if message.event == "PB_CONNECT":
-                                self._client_id = message.id
-                                await self._transmit_subscriptions(force=True)
+                                await self._on_connect(message.id, reconnect=connected)
                                 sentinel.set()
+                                connected = True
+                                attempt = 0
                                 continue
 
                             last_event_id = message.id
 
-                            if message.event in self._subscriptions:
-                                for callback in self._subscriptions[message.event]:
-                                    try:
-                                        await callback(message.json())
-                                    except:  # noqa: E722
-                                        # We never want any exception to break the realtime handler.
-                                        logging.exception("Unhandled exception in realtime event handler")
-                except (TimeoutError, ReadError, RemoteProtocolError):
-                    logging.debug("Connection lost, reconnecting automatically")
+                            # A topic that moved to another connection is delivered from there
+                            if service._owners.get(message.event) is self:
+                                await service._dispatch(message.event, message.data)
+                except (TimeoutError, TransportError, PocketBaseError) as e:
+                    # A failed resubscribe is retried like a lost connection
+                    if isinstance(e, ConnectError | ConnectTimeout | PocketBaseError) and not connected:
+                        # The server was never reached or refused the subscriptions, let the subscriber find out
+                        raise
+
+                    delay = service._backoff.delay(attempt)
+                    attempt += 1
+                    logging.debug("Connection lost, reconnecting in %.2fs", delay)
                     if last_event_id:
                         headers["Last-Event-ID"] = last_event_id
-
+                    await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # Closed, e.g. retired by a rebalance
+            logging.debug("Realtime connection closed")
+            raise
+        except Exception:
+            logging.exception("Connection to realtime endpoint lost")
+            raise
         finally:
             # Disconnected, reset to plain state.
-            logging.exception("Connection to realtime endpoint lost")
-            self._connection = None
-            self._client_id = None
+            self.client_id = None
             self._last_transmit = set()
             sentinel.set()
 
-    async def _transmit_subscriptions(self, force: bool = False) -> None:
-        to_transmit = set(self._subscriptions.keys())
-        if not force and (to_transmit == self._last_transmit or not self._client_id):
+
+class RealtimeService(Service):
+    """
+    Subscriptions to realtime events, spread over as many SSE connections as the topics need.
+
+    PocketBase limits the topics per realtime client, so each connection holds at most `realtime_max_topics`
+    (see `TransportOptions`). Connections are opened and retired as topics come and go.
+    """
+
+    __base_sub_path__ = "/api/realtime"
+
+    def __init__(self, pocketbase: "PocketBase", inners: "PocketBaseInners") -> None:
+        super().__init__(pocketbase, inners)
+        self._subscriptions: dict[str, list[Subscription]] = defaultdict(list)
+        self._connections: list[RealtimeConnection] = []
+        self._shards: dict[str, RealtimeConnection] = {}
+        # The connection delivering each topic, a moved topic stays with its old one until the move is transmitted
+        self._owners: dict[str, RealtimeConnection] = {}
+        self._retired: list[RealtimeConnection] = []
+        self._sync_lock = asyncio.Lock()
+        self._backoff = RetryPolicy({"backoff": inners.realtime_backoff, "max_backoff": inners.realtime_max_backoff})
+        self._reconnect_listeners: list[Callable[[], Awaitable[None]]] = []
+        self._background_tasks: set[Task] = set()
+        self._pending_transmit: asyncio.Future[None] | None = None
+
+    @property
+    def subscription_stats(self) -> list[SubscriptionStats]:
+        """Queue depth, lag (seconds the oldest queued event waits), dropped and delivered events per subscription."""
+        return [subscription.stats for subscriptions in self._subscriptions.values() for subscription in subscriptions]
+
+    def on_reconnect(self, listener: Callable[[], Awaitable[None]]) -> Callable[[], None]:
+        """
+        Registers a function that is run in the background every time the realtime connection is re-established.
+
+        Events that happened while the connection was down are not replayed, listeners can use this to resync.
+        Subscriptions can also catch up on their own, see the `catch_up` option of `RecordService.subscribe`.
+
+        Returns:
+            A function that removes the listener again.
+        """
+
+        self._reconnect_listeners.append(listener)
+
+        def remove() -> None:
+            with suppress(ValueError):
+                self._reconnect_listeners.remove(listener)
+
+        return remove
+
+    def _notify_reconnect(self) -> None:
+        async def run(listener: Callable[[], Awaitable[None]]) -> None:
+            try:
+                await listener()
+            except Exception:
+                logging.exception("Unhandled exception in realtime reconnect listener")
+
+        for listener in list(self._reconnect_listeners):
+            self._spawn(run(listener))
+
+    def _spawn(self, coroutine: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _dispatch(self, topic: str, data: str) -> None:
+        try:
+            event = self._in.codec.loads(data)
+        except ValueError:
+            logging.exception("Invalid realtime event")
             return
 
-        self._last_transmit = to_transmit
+        # Parsed once and shared by all subscriptions, which must not modify it
+        for subscription in list(self._subscriptions.get(topic, ())):
+            # Skip the ones removed while an earlier one was waiting for room
+            if subscription in self._subscriptions.get(topic, ()):
+                await subscription.put(event)
 
-        await self._send_noreturn(
-            "", {"method": "POST", "body": {"clientId": self._client_id, "subscriptions": list(to_transmit)}}
-        )
+    def _rebalance(self) -> list[RealtimeConnection]:
+        """
+        Assigns every topic to a connection, with at most `realtime_max_topics` per connection.
+
+        Topics stay on their connection, unless all topics, including the ones not assigned yet, fit on one
+        connection less. Then the connection with the fewest topics is retired and its topics are moved to the others.
+
+        Returns:
+            The connections that are no longer needed.
+        """
+
+        limit = self._in.realtime_max_topics
+
+        for key, connection in list(self._shards.items()):
+            if key not in self._subscriptions:
+                connection.topics.discard(key)
+                del self._shards[key]
+                self._owners.pop(key, None)
+
+        retired = [connection for connection in self._connections if not connection.topics]
+        self._connections = [connection for connection in self._connections if connection.topics]
+
+        while len(self._connections) > 1 and len(self._subscriptions) <= (len(self._connections) - 1) * limit:
+            emptiest = min(self._connections, key=lambda connection: len(connection.topics))
+            self._connections.remove(emptiest)
+            retired.append(emptiest)
+            for key in emptiest.topics:
+                del self._shards[key]
+
+        for key in self._subscriptions:
+            if key in self._shards:
+                continue
+
+            candidates = [connection for connection in self._connections if len(connection.topics) < limit]
+            if candidates:
+                connection = min(candidates, key=lambda connection: len(connection.topics))
+            else:
+                connection = RealtimeConnection(self)
+                self._connections.append(connection)
+
+            connection.topics.add(key)
+            self._shards[key] = connection
+            self._owners.setdefault(key, connection)
+
+        return retired
+
+    async def _sync(self) -> None:
+        async with self._sync_lock:
+            self._retired.extend(self._rebalance())
+            # Moved topics are subscribed on their new connection before it takes over from the retired one
+            await asyncio.gather(
+                *(
+                    connection.transmit() if connection.running else connection.start()
+                    for connection in self._connections
+                )
+            )
+            self._owners = dict(self._shards)
+            retired, self._retired = self._retired, []
+            await asyncio.gather(*(connection.close() for connection in retired))
+
+    async def _schedule_transmit(self) -> None:
+        """Syncs the subscriptions after the debounce window, all changes made in the meantime share the requests."""
+        if self._pending_transmit is None:
+            self._pending_transmit = asyncio.ensure_future(self._debounced_transmit())
+        # Shielded so a cancelled caller does not cancel the request for the others
+        await asyncio.shield(self._pending_transmit)
+
+    async def _debounced_transmit(self) -> None:
+        await asyncio.sleep(self._in.realtime_debounce)
+        # Changes from here on need a new request
+        self._pending_transmit = None
+        await self._sync()
 
     async def subscribe(
-        self, topic: str, callback: Callback, options: CommonOptions | None = None
+        self, topic: str, callback: Callback, options: SubscribeOptions | None = None
     ) -> Callable[[], Awaitable[None]]:
-        key = quote(topic)
+        """
+        Calls `callback` for every event on `topic`, from a worker task fed by a bounded queue.
 
-        if options:
-            value = json.dumps({"query": options["params"], "headers": options["headers"]})
-            key += f"?options={quote(value)}"
+        Args:
+            topic: The topic, e.g. `"posts/*"` or `"posts/RECORD_ID"`.
+            callback: Called for each event, callbacks on the same subscription run one at a time unless more
+                `workers` are configured.
+            options: The `params` and `headers` for the subscription, and its `queue_size`, `overflow` policy
+                (`drop_oldest` by default, `conflate` events per record id, or `block` the whole connection until
+                there is room) and number of `workers`. A `catch_up` function is called after a reconnect with
+                the newest `updated` value seen, the events it returns are delivered before live delivery resumes.
 
-        async def unsubscribe() -> None:
-            try:
-                self._subscriptions[key].remove(callback)
-                if not self._subscriptions[key]:
-                    del self._subscriptions[key]
-                if not self._subscriptions:
-                    await self.close()
-            except ValueError:
-                pass
-
-        self._subscriptions[key].append(callback)
-        await self._transmit_subscriptions()
-        await self._ensure_connection()
+        Returns:
+            A function that ends the subscription, events still queued for it are discarded.
+        """
+
+        _, unsubscribe = await self._add_subscriptions([(topic, callback)], options)
+        return unsubscribe
+
+    async def subscribe_many(
+        self,
+        subscriptions: Mapping[str, Callback] | Iterable[tuple[str, Callback]],
+        options: SubscribeOptions | None = None,
+    ) -> Callable[[], Awaitable[None]]:
+        """
+        Subscribes to many topics at once, with a single request to the server.
+
+        Args:
+            subscriptions: The topics and the callback for each, as a mapping or as `(topic, callback)` pairs.
+            options: As for `subscribe`, applied to every subscription.
+
+        Returns:
+            A function that ends all of these subscriptions.
+        """
+
+        items = subscriptions.items() if isinstance(subscriptions, Mapping) else subscriptions
+        _, unsubscribe = await self._add_subscriptions(list(items), options)
         return unsubscribe
 
+    def stream(self, topic: str, options: SubscribeOptions | None = None) -> EventStream:
+        """
+        Returns an `EventStream` to iterate over the events on `topic`, instead of passing them to a callback.
+
+        Args:
+            topic: The topic, e.g. `"posts/*"` or `"posts/RECORD_ID"`.
+            options: As for `subscribe`, `queue_size` is the number of events buffered for the consumer.
+        """
+
+        return EventStream(self, topic, options)
+
+    async def _add_subscriptions(
+        self, items: list[tuple[str, Callback | None]], options: SubscribeOptions | None
+    ) -> tuple[list[Subscription], Callable[[], Awaitable[None]]]:
+        query = ""
+        if options and (options.get("params") or options.get("headers")):
+            value = json.dumps({"query": options.get("params", {}), "headers": options.get("headers", {})})
+            query = f"?options={quote(value)}"
+
+        # Registered without awaiting in between, so they are transmitted together
+        added = [Subscription(quote(topic) + query, callback, options) for topic, callback in items]
+        for subscription in added:
+            self._subscriptions[subscription.topic].append(subscription)
+
+        async def unsubscribe() -> None:
+            await self._remove_subscriptions(added)
+
+        try:
+            await self._schedule_transmit()
+        except BaseException:
+            # Not subscribed, e.g. the server could not be reached
+            await asyncio.gather(*(subscription.stop() for subscription in self._detach(added)))
+            raise
+        return added, unsubscribe
+
+    def _detach(self, subscriptions: list[Subscription]) -> list[Subscription]:
+        """Removes the subscriptions from their topics, returns the ones that were not removed before."""
+        removed = []
+        for subscription in subscriptions:
+            topic_subscriptions = self._subscriptions.get(subscription.topic, [])
+            if subscription not in topic_subscriptions:
+                # Already removed
+                continue
+
+            topic_subscriptions.remove(subscription)
+            removed.append(subscription)
+            if not topic_subscriptions:
+                del self._subscriptions[subscription.topic]
+        return removed
+
+    async def _remove_subscriptions(self, subscriptions: list[Subscription]) -> None:
+        removed = self._detach(subscriptions)
+        if not removed:
+            return
+
+        await asyncio.gather(*(subscription.stop() for subscription in removed))
+        if not self._subscriptions:
+            await self.close()
+        else:
+            await self._schedule_transmit()
+
     async def close(self) -> None:
-        if self._connection:
-            self._connection.cancel()
-            with suppress(asyncio.CancelledError):
-                await self._connection
-            self._connection = None
-            self._client_id = None
-            self._last_transmit = set()
+        connections = self._connections + self._retired
+        self._connections, self._retired, self._shards, self._owners = [], [], {}, {}
+        await asyncio.gather(*(connection.close() for connection in connections))
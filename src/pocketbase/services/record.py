@@ -1,36 +1,345 @@
-from collections.abc import Awaitable, Callable
-from typing import TYPE_CHECKING, cast
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Hashable, Iterable, Sequence
+from importlib.util import find_spec
+from time import monotonic
+from typing import TYPE_CHECKING, Any, TypeVar, cast
 from urllib.parse import quote
 
-from pocketbase.models.dtos import AuthMethods, AuthResult, Oauth2Payload, OTPResult, Record
-from pocketbase.models.options import CommonOptions, SendOptions
+from httpx import TransportError
+
+from pocketbase.models.dtos import (
+    AuthMethods,
+    AuthResult,
+    BulkResult,
+    CacheStats,
+    Oauth2Payload,
+    OTPResult,
+    RealtimeEvent,
+    Record,
+)
+from pocketbase.models.errors import PocketBaseBatchError, PocketBaseError, PocketBaseNotFoundError
+from pocketbase.models.options import CommonOptions, IterateOptions, SendOptions, SubscribeOptions
 from pocketbase.services.base import Service
 from pocketbase.services.crud import CrudService
-from pocketbase.services.realtime import Callback
+from pocketbase.services.loader import RecordLoader
+from pocketbase.services.realtime import Callback, EventStream
+from pocketbase.services.replica import CollectionReplica
+from pocketbase.utils.cache import LRUCache
+from pocketbase.utils.columns import ColumnBuilder
+from pocketbase.utils.filter import format_filter
+from pocketbase.utils.records import convert, get_field
 from pocketbase.utils.types import BodyDict
 
 if TYPE_CHECKING:
     from pocketbase.client import PocketBase, PocketBaseInners
 
 
-class RecordService(CrudService[Record]):
+_R = TypeVar("_R")
+
+
+class RecordService(CrudService[_R]):
     __base_sub_path__: str
 
-    def __init__(self, pocketbase: "PocketBase", inners: "PocketBaseInners", collection: str) -> None:
+    def __init__(
+        self, pocketbase: "PocketBase", inners: "PocketBaseInners", collection: str, record_type: type[_R] | None = None
+    ) -> None:
         super().__init__(pocketbase, inners)
         self._collection = collection
+        self._record_type = record_type
         self.__base_sub_path__ = f"/api/collections/{quote(collection)}/records"
         self._auth = RecordAuthService(pocketbase, inners, collection)
+        self._cache: LRUCache[_R | PocketBaseNotFoundError] | None = None
+        self._cache_ttl: float | None = None
+        self._cache_negative_ttl: float | None = None
+        self._cache_unsubscribe: Callable[[], Awaitable[None]] | None = None
+        self._cache_reconnect: Callable[[], None] | None = None
+        self._cache_identity: Hashable = None
+        self._loaders: dict[Hashable, RecordLoader[_R]] = {}
 
     @property
     def auth(self) -> "RecordAuthService":
         return self._auth
 
+    @property
+    def cache_stats(self) -> CacheStats | None:
+        """Hit, miss and eviction counters of the record cache, `None` if caching is disabled."""
+        return self._cache.stats if self._cache else None
+
+    async def enable_cache(
+        self, max_size: int = 1000, ttl: float | None = 60.0, negative_ttl: float | None = 5.0
+    ) -> None:
+        """
+        Serves `get_one` from a local cache that is kept up to date by a realtime subscription on the collection.
+
+        Cached records are shared between callers and must not be modified. Responses are cached per identity
+        (see `PocketBase.as_user`), records from realtime events are cached for the identity enabling the cache.
+
+        Args:
+            max_size: The maximum number of cached responses, the least recently used are evicted first.
+            ttl: Seconds after which a cached record is fetched again, `None` to rely on realtime events only.
+            negative_ttl: Seconds for which a "not found" response is cached, 0 to not cache them.
+        """
+
+        await self.disable_cache()
+        self._cache = LRUCache(max_size)
+        self._cache_ttl = ttl
+        self._cache_negative_ttl = negative_ttl
+        self._cache_identity = self._in.auth.identity
+        # Lossless, a dropped invalidation would leave a stale record, and the callback never waits
+        self._cache_unsubscribe = await self.subscribe_all(self._update_cache, {"overflow": "block"})
+        self._cache_reconnect = self._pb.realtime.on_reconnect(self._clear_cache)
+
+    async def disable_cache(self) -> None:
+        if self._cache_reconnect:
+            self._cache_reconnect()
+        if self._cache_unsubscribe:
+            await self._cache_unsubscribe()
+        self._cache = None
+        self._cache_unsubscribe = None
+        self._cache_reconnect = None
+
+    async def _clear_cache(self) -> None:
+        # Events may have been missed while disconnected
+        if self._cache is not None:
+            self._cache.clear()
+
+    async def _update_cache(self, event: RealtimeEvent) -> None:
+        if self._cache is None or "id" not in event["record"]:
+            return
+
+        self._cache.invalidate(event["record"]["id"])
+
+        if event["action"] != "delete":
+            record = self._convert_record(event["record"])
+            self._cache.set(event["record"]["id"], ((), self._cache_identity), record, self._cache_ttl)
+
+    def _convert_record(self, record: Record) -> _R:
+        # Realtime events are decoded as dicts, convert them like responses
+        return cast(_R, record) if self._record_type is None else convert(record, self._record_type)
+
+    async def get_one(self, record_id: str, options: CommonOptions | None = None) -> _R:
+        if self._cache is None or (options and options.get("headers")):
+            return await super().get_one(record_id, options)
+
+        params = tuple(sorted((k, str(v)) for k, v in options.get("params", {}).items())) if options else ()
+        key = (params, self._in.auth.identity)
+        found, value = self._cache.get(record_id, key)
+
+        if isinstance(value, PocketBaseNotFoundError):
+            raise PocketBaseNotFoundError(value.url, value.status, value.data)
+        elif found and value is not None:
+            return value
+
+        version = self._cache.version
+
+        try:
+            record = await super().get_one(record_id, options)
+        except PocketBaseNotFoundError as e:
+            if self._cache is not None and self._cache_negative_ttl != 0:
+                self._cache.set(record_id, key, e, self._cache_negative_ttl, version)
+            raise
+
+        if self._cache is not None:
+            self._cache.set(record_id, key, record, self._cache_ttl, version)
+        return record
+
+    async def update(self, record_id: str, params: BodyDict, options: CommonOptions | None = None) -> _R:
+        try:
+            return await super().update(record_id, params, options)
+        finally:
+            if self._cache is not None:
+                self._cache.invalidate(record_id)
+
+    async def delete(self, record_id: str, options: CommonOptions | None = None) -> None:
+        try:
+            await super().delete(record_id, options)
+        finally:
+            if self._cache is not None:
+                self._cache.invalidate(record_id)
+
+    def loader(self, options: CommonOptions | None = None, window: float = 0.0) -> RecordLoader[_R]:
+        """
+        Returns a loader that batches concurrent `load(record_id)` calls into a single `get_list` request.
+
+        Args:
+            options: Options (e.g. `expand` or `fields` params) applied to every loaded record.
+            window: Seconds to wait for more calls before sending, by default only calls made in the same event
+                loop iteration are batched.
+
+        Loaders are not shared between identities (see `PocketBase.as_user`), so only calls made as the same
+        user are batched together.
+        """
+
+        key = (
+            tuple(sorted((k, str(v)) for k, v in options.get("params", {}).items())) if options else (),
+            tuple(sorted(options.get("headers", {}).items())) if options else (),
+            window,
+            self._in.auth.identity,
+        )
+
+        if key not in self._loaders:
+            self._loaders[key] = RecordLoader(self, options, window)
+        return self._loaders[key]
+
+    async def replicate(
+        self, indexes: Sequence[str] = (), updated_field: str = "updated", batch: int = 500
+    ) -> CollectionReplica[_R]:
+        """
+        Loads the whole collection into memory and keeps it up to date through realtime events.
+
+        Args:
+            indexes: Fields to keep an index on, speeding up `CollectionReplica.find` on those fields.
+            updated_field: An autodate field that changes on every update, used to only fetch the changed records
+                after a reconnect.
+            batch: The number of records fetched per request.
+
+        Returns:
+            The loaded replica, call `close()` on it to stop receiving updates.
+        """
+
+        replica = CollectionReplica(self, indexes, updated_field, batch)
+        await replica.start()
+        return replica
+
+    async def to_columns(
+        self, fields: Sequence[str], options: IterateOptions | None = None, numpy: bool | None = None
+    ) -> dict[str, Any]:
+        """
+        Loads `fields` of all (matching) records as columns, page by page, without keeping the records around.
+
+        Numbers and booleans are stored in typed arrays, strings are dictionary encoded in a `DictionaryColumn`
+        and other values (lists, objects or mixed types) in plain lists, see `utils.columns.ColumnBuilder`.
+
+        Args:
+            fields: The fields to load, dotted paths into `expand` are not supported.
+            options: Options for `iterate_pages`, e.g. a filter, the page size (`batch`) or a `cursor`. Unless given,
+                the `fields` param limits the response to the requested fields. The `id` and cursor fields are
+                always fetched, but only returned as columns if requested.
+            numpy: Return NumPy arrays instead of `array.array`s, by default if NumPy is installed.
+
+        Returns:
+            A column per field, in the order records were returned.
+        """
+
+        iterate_options: IterateOptions = {**(options or {})}
+        params = {"fields": ",".join(fields), **iterate_options.get("params", {})}
+        if params["fields"] != "*":
+            # Paging by cursor needs the key fields of the last record
+            fetched = str(params["fields"]).split(",")
+            keys = [key.strip().lstrip("+-") for key in iterate_options.get("cursor", "").split(",") if key.strip()]
+            params["fields"] = ",".join(dict.fromkeys([*fetched, "id", *keys]))
+        iterate_options["params"] = params
+        builders = {field: ColumnBuilder() for field in fields}
+
+        async for records in self.iterate_pages(iterate_options):
+            for record in records:
+                for field, builder in builders.items():
+                    builder.append(get_field(record, field))
+
+        if numpy is None:
+            numpy = find_spec("numpy") is not None
+        return {field: builder.build(numpy) for field, builder in builders.items()}
+
+    async def bulk_create(
+        self,
+        source: Iterable[BodyDict] | AsyncIterable[BodyDict],
+        concurrency: int = 4,
+        batch_size: int = 1,
+        options: CommonOptions | None = None,
+        progress: Callable[[int], None] | None = None,
+        upsert: bool = False,
+    ) -> BulkResult:
+        """
+        Creates a record for every body in `source`, with at most `concurrency` requests in flight.
+
+        Failed rows, including those of a request that failed with a transport error or timeout, do not stop the
+        run, they are collected in the result. With a `batch_size` above 1 rows are sent in batch requests (the
+        batch api must be enabled and allow `batch_size` requests). A batch is all-or-nothing, so after a failure
+        it is sent again without the failed rows.
+
+        Args:
+            source: An iterable or async iterable of record bodies, consumed as requests complete.
+            concurrency: The maximum number of requests in flight.
+            batch_size: The number of rows per request.
+            options: Options for every create request.
+            progress: Called with the number of rows from the start of `source` that are done (created or failed),
+                e.g. to store a checkpoint to resume from.
+            upsert: Update the records whose `id` already exists instead of failing. Upserts are always sent as
+                batch requests, so this requires the batch api.
+
+        Returns:
+            The number of created (or upserted) records, the index and error of each failed row and the throughput.
+        """
+
+        start = monotonic()
+        result: BulkResult = {"created": 0, "failed": [], "elapsed": 0.0, "rows_per_second": 0.0}
+        semaphore = asyncio.Semaphore(concurrency)
+        finished: dict[int, int] = {}
+        done = 0
+
+        async def create_chunk(first: int, rows: list[BodyDict]) -> None:
+            nonlocal done
+            try:
+                await self._bulk_create_chunk(first, rows, options, upsert, result)
+            finally:
+                semaphore.release()
+
+            finished[first] = len(rows)
+            while done in finished:
+                done += finished.pop(done)
+            if progress:
+                progress(done)
+
+        async with asyncio.TaskGroup() as tasks:
+            async for first, rows in _chunks(source, batch_size):
+                await semaphore.acquire()
+                tasks.create_task(create_chunk(first, rows))
+
+        result["elapsed"] = monotonic() - start
+        result["rows_per_second"] = done / result["elapsed"] if result["elapsed"] > 0 else 0.0
+        return result
+
+    async def _bulk_create_chunk(
+        self, first: int, rows: list[BodyDict], options: CommonOptions | None, upsert: bool, result: BulkResult
+    ) -> None:
+        if len(rows) == 1 and not upsert:
+            try:
+                await self.create(rows[0], options)
+                result["created"] += 1
+            except (PocketBaseError, TransportError) as e:
+                result["failed"].append({"index": first, "error": e})
+            return
+
+        pending = dict(enumerate(rows, first))
+        while pending:
+            batch = self._pb.create_batch()
+            indexes = list(pending)
+            for index in indexes:
+                if upsert:
+                    batch.collection(self._collection).upsert(pending[index], options)
+                else:
+                    batch.collection(self._collection).create(pending[index], options)
+
+            try:
+                # One request per chunk, so it is committed or rolled back as a whole
+                await batch.send({"max_requests": len(indexes)})
+            except PocketBaseBatchError as e:
+                for position, error in e.errors.items():
+                    result["failed"].append({"index": indexes[position], "error": error})
+                    del pending[indexes[position]]
+            except (PocketBaseError, TransportError) as e:
+                # Whether a batch that timed out was committed is unknown, its rows are reported as failed
+                result["failed"].extend({"index": index, "error": e} for index in indexes)
+                return
+            else:
+                result["created"] += len(indexes)
+                return
+
     async def subscribe(
         self,
         callback: Callback,
         record_id: str,
-        options: CommonOptions | None = None,
+        options: SubscribeOptions | None = None,
     ) -> Callable[[], Awaitable[None]]:
         """
         Subscribes to a specific record identified by `record_id`.
@@ -38,7 +347,8 @@ class RecordService(CrudService[Record]):
         Args:
             callback: Function to be called when updates occur for the record.
             record_id: The ID of the record to subscribe to.
-            options: Additional options for the subscription (optional).
+            options: Additional options for the subscription, see `RealtimeService.subscribe` (optional). With
+                `catch_up=True` the record is fetched again after a reconnect if it was updated in the meantime.
 
         Raises:
             ValueError: If `record_id` is empty or None.
@@ -47,23 +357,86 @@ class RecordService(CrudService[Record]):
         if not record_id:
             raise ValueError("Invalid record_id: cannot be empty or None")
 
-        return await self._pb.realtime.subscribe(f"{self._collection}/{record_id}", callback, options)
+        return await self._pb.realtime.subscribe(
+            f"{self._collection}/{record_id}", callback, self._with_catch_up(options, record_id)
+        )
 
     async def subscribe_all(
-        self, callback: Callback, options: CommonOptions | None = None
+        self, callback: Callback, options: SubscribeOptions | None = None
     ) -> Callable[[], Awaitable[None]]:
         """
         Subscribes to all records in the current collection.
 
         Args:
             callback: Function to be called when updates occur for any record.
-            options: Additional options for the subscription (optional).
+            options: Additional options for the subscription, see `RealtimeService.subscribe` (optional). With
+                `catch_up=True` the records updated while the connection was lost are delivered as update events
+                after a reconnect, `updated` is added to a `fields` param for this. Deletions in that time are not.
 
         Returns:
             A function to unsubscribe from all records.
         """
 
-        return await self._pb.realtime.subscribe(self._collection, callback, options)
+        return await self._pb.realtime.subscribe(self._collection, callback, self._with_catch_up(options))
+
+    def events(
+        self,
+        filter: str | None = None,  # noqa: A002
+        record_id: str | None = None,
+        buffer: int | None = None,
+        options: SubscribeOptions | None = None,
+    ) -> EventStream:
+        """
+        Returns an async iterator over the realtime events of the collection, see `RealtimeService.stream`.
+
+        Args:
+            filter: Only receive events for records matching this filter (optional).
+            record_id: Only receive events for this record instead of all records (optional).
+            buffer: How many events are queued for the consumer, see `SubscribeOptions.queue_size` (optional).
+            options: Additional options for the subscription, see `RealtimeService.subscribe` (optional).
+
+        Example:
+            async for event in pb.collection("orders").events(filter="status = 'paid'"):
+                ...
+        """
+
+        subscribe_options: SubscribeOptions = {**(options or {})}
+        if filter:
+            subscribe_options["params"] = {**subscribe_options.get("params", {}), "filter": filter}
+        if buffer is not None:
+            subscribe_options["queue_size"] = buffer
+
+        topic = f"{self._collection}/{record_id}" if record_id else self._collection
+        return self._pb.realtime.stream(topic, self._with_catch_up(subscribe_options, record_id))
+
+    def _with_catch_up(self, options: SubscribeOptions | None, record_id: str | None = None) -> SubscribeOptions | None:
+        """Replaces `catch_up=True` with a hook that fetches the records updated since, as update events."""
+        if not options or options.get("catch_up") is not True:
+            return options
+
+        params = options.get("params", {})
+        if params.get("fields") and params["fields"] != "*":
+            # Catching up starts from the newest `updated` seen, without it only the client's clock is known
+            params = {**params, "fields": ",".join(dict.fromkeys([*str(params["fields"]).split(","), "updated"]))}
+
+        expressions = [format_filter("id = {:id}", {"id": record_id})] if record_id else []
+        if params.get("filter"):
+            expressions.append(f"({params['filter']})")
+
+        fetch_params = {key: value for key, value in params.items() if key in ("expand", "fields")}
+
+        async def catch_up(since: str) -> list[RealtimeEvent]:
+            changed = format_filter("updated >= {:since}", {"since": since})
+            iterate_options: IterateOptions = {
+                "cursor": "id",
+                "filter": " && ".join([*expressions, changed]),
+                "params": fetch_params,
+            }
+            # Fetched as dicts, like the records of live events
+            service = self._pb.collection(self._collection)
+            return [{"action": "update", "record": record} async for record in service.iterate(iterate_options)]
+
+        return {**options, "params": params, "catch_up": catch_up}
 
 
 class RecordAuthService(Service):
@@ -135,8 +508,10 @@ class RecordAuthService(Service):
             send_options.update(options)
 
         self._in.auth.set_is_refreshing(True)
-        result: AuthResult = await self._send("/auth-refresh", send_options)  # type: ignore
-        self._in.auth.set_is_refreshing(False)
+        try:
+            result: AuthResult = await self._send("/auth-refresh", send_options)  # type: ignore
+        finally:
+            self._in.auth.set_is_refreshing(False)
         self._in.auth.set_user(result)
         return result
 
@@ -156,3 +531,25 @@ class RecordAuthService(Service):
         result: AuthResult = await self._send(f"/impersonate/{record_id}", send_options)  # type: ignore
         self._in.auth.set_user(result)
         return result
+
+
+async def _chunks(
+    source: Iterable[BodyDict] | AsyncIterable[BodyDict], size: int
+) -> AsyncIterator[tuple[int, list[BodyDict]]]:
+    rows = source if isinstance(source, AsyncIterable) else _aiter(source)
+    chunk: list[BodyDict] = []
+    first = 0
+
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield first, chunk
+            first, chunk = first + size, []
+
+    if chunk:
+        yield first, chunk
+
+
+async def _aiter(source: Iterable[BodyDict]) -> AsyncIterator[BodyDict]:
+    for row in source:
+        yield row
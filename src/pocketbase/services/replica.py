@@ -0,0 +1,175 @@
+import asyncio
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Hashable, Iterator, Sequence
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
+
+from pocketbase.models.dtos import RealtimeEvent
+from pocketbase.models.options import IterateOptions
+from pocketbase.utils.filter import format_filter
+from pocketbase.utils.records import get_field
+
+if TYPE_CHECKING:
+    from pocketbase.services.record import RecordService
+
+_R = TypeVar("_R")
+
+
+def _index_values(value: Any) -> list[Hashable]:
+    values = value if isinstance(value, list) else [value]
+    return [v for v in values if isinstance(v, Hashable)]
+
+
+class CollectionReplica(Generic[_R]):
+    """
+    An in-memory copy of a collection that is kept up to date through realtime events.
+
+    Use `RecordService.replicate` to create one. Records are shared with the replica and must not be modified.
+    When the realtime connection is re-established the replica fetches the records changed since the newest
+    `updated_field` value it holds and drops records that no longer exist, or reloads everything if the
+    collection has no such field.
+    """
+
+    def __init__(
+        self,
+        service: "RecordService[_R]",
+        indexes: Sequence[str] = (),
+        updated_field: str = "updated",
+        batch: int = 500,
+    ) -> None:
+        self._service = service
+        self._updated_field = updated_field
+        self._batch = batch
+        self._records: dict[str, _R] = {}
+        self._indexes: dict[str, defaultdict[Hashable, set[str]]] = {field: defaultdict(set) for field in indexes}
+        self._lock = asyncio.Lock()
+        self._touched: dict[str, str] | None = None
+        self._unsubscribe: Callable[[], Awaitable[None]] | None = None
+        self._remove_listener: Callable[[], None] | None = None
+
+    async def start(self) -> None:
+        # Lossless, a dropped event would leave a stale record, and the callback never waits
+        self._unsubscribe = await self._service.subscribe_all(self._on_event, {"overflow": "block"})
+        self._remove_listener = self._service._pb.realtime.on_reconnect(self.resync)
+        await self.resync()
+
+    async def close(self) -> None:
+        if self._remove_listener:
+            self._remove_listener()
+        if self._unsubscribe:
+            await self._unsubscribe()
+        self._remove_listener = None
+        self._unsubscribe = None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, record_id: object) -> bool:
+        return record_id in self._records
+
+    def __iter__(self) -> Iterator[_R]:
+        return iter(list(self._records.values()))
+
+    def get(self, record_id: str) -> _R | None:
+        return self._records.get(record_id)
+
+    def find(self, **fields: Any) -> list[_R]:
+        """
+        Returns the records whose fields equal the given values (or, for list fields, contain them).
+
+        Indexed fields are looked up in their index, other fields are compared record by record.
+        """
+
+        candidates: set[str] | None = None
+
+        for field, value in fields.items():
+            if field in self._indexes:
+                ids = self._indexes[field].get(value, set()) if isinstance(value, Hashable) else set()
+                candidates = ids if candidates is None else candidates & ids
+
+        records = self._records.values() if candidates is None else [self._records[i] for i in candidates]
+        return [record for record in records if all(self._matches(record, f, v) for f, v in fields.items())]
+
+    @staticmethod
+    def _matches(record: Any, field: str, value: Any) -> bool:
+        current = get_field(record, field)
+        return current == value or (isinstance(current, list) and value in current)
+
+    async def resync(self) -> None:
+        """Brings the replica up to date with the server, see the class documentation."""
+        async with self._lock:
+            self._touched = {}
+            try:
+                since = self._high_water()
+
+                if since is None:
+                    seen = await self._fetch({"batch": self._batch, "cursor": "id"})
+                else:
+                    changed = format_filter(f"{self._updated_field} >= {{:since}}", {"since": since})
+                    await self._fetch({"batch": self._batch, "cursor": "id", "filter": changed})
+                    seen = await self._fetch_ids()
+
+                for record_id in [i for i in self._records if i not in seen and i not in self._touched]:
+                    self._remove(record_id)
+            finally:
+                self._touched = None
+
+    def _high_water(self) -> str | None:
+        values = [get_field(record, self._updated_field) for record in self._records.values()]
+        if not values or not all(isinstance(value, str) for value in values):
+            return None
+        return max(values)
+
+    async def _fetch(self, options: IterateOptions) -> set[str]:
+        seen: set[str] = set()
+
+        async for records in self._service.iterate_pages(options):
+            for record in records:
+                record_id = get_field(record, "id")
+                seen.add(record_id)
+                if self._touched is None or self._touched.get(record_id) != "delete":
+                    self._put(record_id, record)
+
+        return seen
+
+    async def _fetch_ids(self) -> set[str]:
+        options: IterateOptions = {"batch": max(self._batch, 1000), "cursor": "id", "params": {"fields": "id"}}
+        # Fetched as dicts, a record type may not allow leaving out the other fields
+        service = self._service._pb.collection(self._service._collection)
+        return {record["id"] async for records in service.iterate_pages(options) for record in records}
+
+    async def _on_event(self, event: RealtimeEvent) -> None:
+        record = event["record"]
+
+        if self._touched is not None:
+            self._touched[record["id"]] = event["action"]
+
+        if event["action"] == "delete":
+            self._remove(record["id"])
+        else:
+            self._put(record["id"], self._service._convert_record(record))
+
+    def _put(self, record_id: str, record: _R) -> None:
+        current = self._records.get(record_id)
+
+        if current is not None:
+            current_updated, updated = get_field(current, self._updated_field), get_field(record, self._updated_field)
+            if isinstance(current_updated, str) and isinstance(updated, str) and current_updated > updated:
+                # We already hold a newer version of this record
+                return
+            self._remove(record_id)
+
+        self._records[record_id] = record
+        for field, index in self._indexes.items():
+            for value in _index_values(get_field(record, field)):
+                index[value].add(record_id)
+
+    def _remove(self, record_id: str) -> None:
+        record = self._records.pop(record_id, None)
+        if record is None:
+            return
+
+        for field, index in self._indexes.items():
+            for value in _index_values(get_field(record, field)):
+                index[value].discard(record_id)
+                if not index[value]:
+                    del index[value]
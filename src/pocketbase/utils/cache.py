@@ -0,0 +1,90 @@
+from collections import OrderedDict, defaultdict
+from collections.abc import Hashable
+from time import monotonic
+from typing import Generic, TypeVar
+
+from pocketbase.models.dtos import CacheStats
+
+_V = TypeVar("_V")
+
+
+class LRUCache(Generic[_V]):
+    """
+    A least-recently-used cache with per-entry expiry, grouping keys by record id for invalidation.
+
+    Callers that fetch a value can pass the `version` they saw before fetching to `set`, so a response that raced
+    with an invalidation of the same record is not stored. Invalidations are remembered for the last `max_size`
+    record ids, older ones only raise the version floor.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._entries: OrderedDict[tuple[str, Hashable], tuple[float | None, _V]] = OrderedDict()
+        self._keys: defaultdict[str, set[Hashable]] = defaultdict(set)
+        self._version = 0
+        self._version_floor = 0
+        self._invalidated: OrderedDict[str, int] = OrderedDict()
+        self._stats: CacheStats = {"hits": 0, "misses": 0, "evictions": 0, "size": 0}
+
+    @property
+    def stats(self) -> CacheStats:
+        return {**self._stats, "size": len(self._entries)}
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, record_id: str, key: Hashable) -> tuple[bool, _V | None]:
+        entry = self._entries.get((record_id, key))
+
+        if entry is not None and entry[0] is not None and entry[0] < monotonic():
+            self._remove(record_id, key)
+            entry = None
+
+        if entry is None:
+            self._stats["misses"] += 1
+            return False, None
+
+        self._stats["hits"] += 1
+        self._entries.move_to_end((record_id, key))
+        return True, entry[1]
+
+    def set(self, record_id: str, key: Hashable, value: _V, ttl: float | None, version: int | None = None) -> None:
+        if version is not None and (self._version_floor > version or self._invalidated.get(record_id, 0) > version):
+            return
+
+        self._entries[(record_id, key)] = (None if ttl is None else monotonic() + ttl, value)
+        self._entries.move_to_end((record_id, key))
+        self._keys[record_id].add(key)
+
+        while len(self._entries) > self._max_size:
+            (evicted_id, evicted_key), _ = self._entries.popitem(last=False)
+            self._discard_key(evicted_id, evicted_key)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, record_id: str) -> None:
+        self._version += 1
+        self._invalidated[record_id] = self._version
+        self._invalidated.move_to_end(record_id)
+
+        while len(self._invalidated) > self._max_size:
+            _, self._version_floor = self._invalidated.popitem(last=False)
+
+        for key in self._keys.pop(record_id, ()):
+            self._entries.pop((record_id, key), None)
+
+    def clear(self) -> None:
+        self._version += 1
+        self._version_floor = self._version
+        self._invalidated.clear()
+        self._entries.clear()
+        self._keys.clear()
+
+    def _remove(self, record_id: str, key: Hashable) -> None:
+        del self._entries[(record_id, key)]
+        self._discard_key(record_id, key)
+
+    def _discard_key(self, record_id: str, key: Hashable) -> None:
+        self._keys[record_id].discard(key)
+        if not self._keys[record_id]:
+            del self._keys[record_id]
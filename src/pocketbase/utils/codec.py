@@ -0,0 +1,99 @@
+import json
+from datetime import datetime
+from typing import Any, Protocol
+
+from pocketbase.utils.records import convert
+from pocketbase.utils.types import format_datetime
+
+
+class JsonCodec(Protocol):
+    """Encodes request bodies and decodes responses, `datetime` values are encoded as PocketBase dates."""
+
+    def dumps(self, value: Any) -> bytes: ...
+
+    def loads(self, data: bytes | str, decode_as: Any = None) -> Any:
+        """
+        Decodes `data`, into `decode_as` if given (see `utils.records.convert` for the supported types).
+
+        Raises:
+            ValueError: On invalid JSON or JSON that does not match `decode_as`.
+        """
+        ...
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return format_datetime(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class StdlibCodec:
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes | str, decode_as: Any = None) -> Any:
+        value = json.loads(data)
+        return value if decode_as is None else convert(value, decode_as)
+
+
+class OrjsonCodec:
+    def __init__(self) -> None:
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, value: Any) -> bytes:
+        return self._orjson.dumps(value, default=_default, option=self._orjson.OPT_PASSTHROUGH_DATETIME)
+
+    def loads(self, data: bytes | str, decode_as: Any = None) -> Any:
+        value = self._orjson.loads(data)
+        return value if decode_as is None else convert(value, decode_as)
+
+
+class MsgspecCodec:
+    """
+    Uses msgspec to decode. Responses with a `decode_as` type are decoded straight into that type, without
+    building dicts first.
+
+    msgspec encodes `datetime` values itself (without a `Z` for naive ones), so bodies are encoded with orjson when
+    installed and the standard library otherwise, like the other codecs.
+    """
+
+    def __init__(self) -> None:
+        import msgspec
+
+        self._msgspec = msgspec
+        self._decoders: dict[Any, Any] = {None: msgspec.json.Decoder()}
+        self._encoder: OrjsonCodec | StdlibCodec
+        try:
+            self._encoder = OrjsonCodec()
+        except ImportError:
+            self._encoder = StdlibCodec()
+
+    def dumps(self, value: Any) -> bytes:
+        return self._encoder.dumps(value)
+
+    def loads(self, data: bytes | str, decode_as: Any = None) -> Any:
+        decoder = self._decoders.get(decode_as)
+        if decoder is None:
+            decoder = self._decoders[decode_as] = self._msgspec.json.Decoder(decode_as)
+
+        try:
+            return decoder.decode(data)
+        except self._msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+
+def default_codec() -> JsonCodec:
+    """
+    Returns the fastest available codec: msgspec, orjson or the standard library, in that order.
+
+    msgspec comes first as only it decodes typed records without intermediate dicts, it encodes with orjson if
+    that is installed too.
+    """
+    for codec in (MsgspecCodec, OrjsonCodec):
+        try:
+            return codec()
+        except ImportError:
+            continue
+    return StdlibCodec()
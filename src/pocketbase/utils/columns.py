@@ -0,0 +1,146 @@
+from array import array
+from collections.abc import Iterator
+from typing import Any, Literal
+
+_Kind = Literal["bool", "int", "float", "str", "object"]
+_TYPECODES: dict[_Kind, str] = {"bool": "b", "int": "q", "float": "d"}
+_NUMPY_DTYPES = {"b": "int8", "q": "int64", "d": "float64", "i": "int32"}
+
+
+class DictionaryColumn:
+    """
+    A column of strings stored as integer `codes` into the list of distinct `values`, a code of -1 means `None`.
+
+    `codes` is an `array.array` or, when converted for NumPy, an int32 array.
+    """
+
+    def __init__(self, codes: Any, values: list[str]) -> None:
+        self.codes = codes
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> str | None:
+        code = int(self.codes[index])
+        return None if code < 0 else self.values[code]
+
+    def __iter__(self) -> Iterator[str | None]:
+        return (None if code < 0 else self.values[code] for code in self.codes)
+
+    def __repr__(self) -> str:
+        return f"DictionaryColumn(len={len(self)},values={len(self.values)})"
+
+
+class ColumnBuilder:
+    """
+    Collects the values of one field into a compact buffer, choosing the type from the values seen.
+
+    Booleans, integers and floats are stored in an `array.array`. Integers become floats (with NaN for `None`)
+    when floats or `None` appear. Strings are dictionary encoded. Any other mix falls back to a plain list.
+    """
+
+    def __init__(self) -> None:
+        self._kind: _Kind | None = None
+        self._nulls = 0
+        self._data: Any = None
+        self._index: dict[str, int] = {}
+        self._values: list[str] = []
+
+    def append(self, value: Any) -> None:
+        if self._kind is None:
+            if value is None:
+                self._nulls += 1
+                return
+            self._start(self._kind_of(value))
+
+        if self._kind == "str":
+            self._append_str(value)
+        elif self._kind == "object":
+            self._data.append(value)
+        else:
+            self._append_number(value)
+
+    def build(self, numpy: bool = False) -> Any:
+        """Returns the column: an `array.array`, a `DictionaryColumn` or a list, or NumPy arrays if `numpy`."""
+        if self._kind is None:
+            return [None] * self._nulls
+        elif self._kind == "object":
+            return self._data
+        elif self._kind == "str":
+            return DictionaryColumn(_to_numpy(self._data) if numpy else self._data, self._values)
+        elif self._kind == "bool" and numpy:
+            return _to_numpy(self._data).astype(bool)
+        return _to_numpy(self._data) if numpy else self._data
+
+    @staticmethod
+    def _kind_of(value: Any) -> _Kind:
+        if isinstance(value, bool):
+            return "bool"
+        elif isinstance(value, int):
+            return "int"
+        elif isinstance(value, float):
+            return "float"
+        elif isinstance(value, str):
+            return "str"
+        return "object"
+
+    def _start(self, kind: _Kind) -> None:
+        if kind == "int" and self._nulls:
+            kind = "float"
+        elif kind == "bool" and self._nulls:
+            kind = "object"
+
+        self._kind = kind
+        if kind == "str":
+            self._data = array("i", [-1] * self._nulls)
+        elif kind == "object":
+            self._data = [None] * self._nulls
+        elif kind == "float":
+            self._data = array("d", [float("nan")] * self._nulls)
+        else:
+            self._data = array(_TYPECODES[kind])
+
+    def _append_str(self, value: Any) -> None:
+        if value is None:
+            self._data.append(-1)
+        elif isinstance(value, str):
+            code = self._index.get(value)
+            if code is None:
+                code = self._index[value] = len(self._values)
+                self._values.append(value)
+            self._data.append(code)
+        else:
+            self._to_object().append(value)
+
+    def _append_number(self, value: Any) -> None:
+        if value is not None and self._kind_of(value) == self._kind:
+            try:
+                self._data.append(value)
+            except OverflowError:
+                self._to_object().append(value)
+        elif self._kind in ("int", "float") and (value is None or self._kind_of(value) in ("int", "float")):
+            if self._kind == "int":
+                self._kind = "float"
+                self._data = array("d", self._data)
+            self._data.append(float("nan") if value is None else float(value))
+        else:
+            self._to_object().append(value)
+
+    def _to_object(self) -> list[Any]:
+        if self._kind == "str":
+            self._data = [None if code < 0 else self._values[code] for code in self._data]
+            self._index, self._values = {}, []
+        elif self._kind == "bool":
+            self._data = [bool(value) for value in self._data]
+        elif self._kind != "object":
+            self._data = list(self._data)
+
+        self._kind = "object"
+        return self._data
+
+
+def _to_numpy(data: array) -> Any:
+    import numpy
+
+    return numpy.frombuffer(data, dtype=_NUMPY_DTYPES[data.typecode])
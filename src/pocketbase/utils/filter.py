@@ -1 +1,63 @@
-# TODO: filter expression helper
+import json
+import re
+from collections.abc import Mapping, Sequence
+from datetime import UTC, datetime
+from typing import Any
+
+from pocketbase.utils.records import get_field
+
+_PLACEHOLDER = re.compile(r"\{:(\w+)\}")
+
+
+def quote_value(value: Any) -> str:
+    if value is None:
+        return "null"
+    elif isinstance(value, bool):
+        return "true" if value else "false"
+    elif isinstance(value, int | float):
+        return str(value)
+    elif isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        value = value.isoformat(sep=" ", timespec="milliseconds") + "Z"
+    elif not isinstance(value, str):
+        value = json.dumps(value)
+
+    return "'" + value.replace("'", "\\'") + "'"
+
+
+def format_filter(expression: str, params: Mapping[str, Any]) -> str:
+    """
+    Replaces the `{:name}` placeholders in a filter expression with the safely quoted value of `params["name"]`.
+
+    Example:
+        format_filter("title ~ {:title} && created > {:created}", {"title": "it's", "created": datetime.now()})
+    """
+
+    def replace(match: re.Match[str]) -> str:
+        key = match.group(1)
+        return quote_value(params[key]) if key in params else match.group(0)
+
+    # A single pass, so placeholders inside substituted values are left alone
+    return _PLACEHOLDER.sub(replace, expression)
+
+
+def keyset_filter(sort: Sequence[str], last: Any) -> str:
+    """
+    Builds a filter that matches all records sorted after the record `last` when sorting by the (unique) `sort`
+    fields.
+
+    Example:
+        keyset_filter(["-created", "id"], record) == "(created < '...') || (created = '...' && id > '...')"
+    """
+
+    fields = [key.lstrip("+-") for key in sort]
+    clauses = []
+
+    for index, key in enumerate(sort):
+        operator = "<" if key.startswith("-") else ">"
+        clause = [f"{field} = {quote_value(get_field(last, field))}" for field in fields[:index]]
+        clause.append(f"{fields[index]} {operator} {quote_value(get_field(last, fields[index]))}")
+        clauses.append("(" + " && ".join(clause) + ")")
+
+    return " || ".join(clauses)
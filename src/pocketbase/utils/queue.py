@@ -0,0 +1,97 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import Hashable
+from itertools import count
+from time import monotonic
+from typing import Generic, Literal, TypeVar
+
+_V = TypeVar("_V")
+
+Overflow = Literal["block", "drop_oldest", "conflate"]
+
+
+class QueueClosed(Exception):
+    """Raised by `EventQueue.get` once the queue is closed and empty."""
+
+
+class EventQueue(Generic[_V]):
+    """
+    A bounded FIFO queue with a policy for when it is full.
+
+    - `block`: `put` waits until there is room, or the queue is closed.
+    - `drop_oldest`: the oldest queued item is dropped to make room.
+    - `conflate`: an item with the `key` of an already queued item replaces it in its place, when full the oldest
+      item is dropped as with `drop_oldest`.
+    """
+
+    def __init__(self, maxsize: int, overflow: Overflow = "block") -> None:
+        self._maxsize = maxsize
+        self._overflow = overflow
+        self._items: OrderedDict[Hashable, tuple[float, _V]] = OrderedDict()
+        self._sequence = count()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._closed = False
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def lag(self) -> float:
+        """Seconds the oldest queued item has been waiting."""
+        if not self._items:
+            return 0.0
+        return monotonic() - next(iter(self._items.values()))[0]
+
+    def close(self) -> None:
+        """
+        Wakes up waiting consumers and producers, `get` raises `QueueClosed` once the remaining items are taken.
+
+        Items put after closing are discarded.
+        """
+        self._closed = True
+        self._not_empty.set()
+        self._not_full.set()
+
+    async def put(self, item: _V, key: Hashable = None) -> None:
+        if self._closed:
+            return
+
+        conflate = self._overflow == "conflate" and key is not None
+        entry = ("key", key) if conflate else ("seq", next(self._sequence))
+
+        if conflate and entry in self._items:
+            # Keep the position and enqueue time, so conflated items are not starved
+            self._items[entry] = (self._items[entry][0], item)
+            return
+
+        while len(self._items) >= self._maxsize:
+            if self._closed:
+                return
+            elif self._overflow == "block":
+                self._not_full.clear()
+                await self._not_full.wait()
+            else:
+                self._items.popitem(last=False)
+                self.dropped += 1
+
+        self._items[entry] = (monotonic(), item)
+        self._not_empty.set()
+
+    async def get(self) -> _V:
+        while not self._items:
+            if self._closed:
+                raise QueueClosed
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def get_nowait(self) -> _V:
+        """Raises `asyncio.QueueEmpty` if there is nothing queued."""
+        if not self._items:
+            raise asyncio.QueueEmpty
+        _, (_, item) = self._items.popitem(last=False)
+        self._not_full.set()
+        return item
@@ -0,0 +1,68 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from fnmatch import fnmatchcase
+from time import monotonic
+
+from pocketbase.models.options import RateLimitOptions
+
+
+class TokenBucket:
+    """Lets `rate` acquisitions per second through on average, with bursts of up to `burst`, in arrival order."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= 1
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class RouteLimiter:
+    """
+    Applies rate and concurrency limits to the requests whose path matches a pattern.
+
+    Patterns are `fnmatch` patterns that also match everything below them, so `/api/collections/*/records` covers
+    `/api/collections/posts/records/abc`. A request must satisfy the limits of every matching pattern.
+    """
+
+    def __init__(self, limits: dict[str, RateLimitOptions]) -> None:
+        self._routes: list[tuple[str, TokenBucket | None, asyncio.Semaphore | None]] = [
+            (
+                pattern.rstrip("/"),
+                TokenBucket(options["rate"], options.get("burst", 1)) if "rate" in options else None,
+                asyncio.Semaphore(options["concurrency"]) if "concurrency" in options else None,
+            )
+            for pattern, options in limits.items()
+        ]
+
+    def _matches(self, pattern: str, path: str) -> bool:
+        return fnmatchcase(path, pattern) or fnmatchcase(path, pattern + "/*")
+
+    async def throttle(self, path: str) -> None:
+        """Waits until every rate limit on `path` allows another request."""
+        for pattern, bucket, _ in self._routes:
+            if bucket is not None and self._matches(pattern, path):
+                await bucket.acquire()
+
+    @asynccontextmanager
+    async def slot(self, path: str) -> AsyncIterator[None]:
+        """Holds a place in every concurrency limit on `path` for the duration of the block."""
+        async with AsyncExitStack() as stack:
+            for pattern, _, semaphore in self._routes:
+                if semaphore is not None and self._matches(pattern, path):
+                    await stack.enter_async_context(semaphore)
+            yield
@@ -0,0 +1,82 @@
+import keyword
+from collections.abc import Mapping
+from dataclasses import fields, is_dataclass, make_dataclass
+from functools import cache
+from typing import Any, cast, get_args, get_origin, is_typeddict
+
+from pocketbase.models.dtos import CollectionModel, ListResult
+
+_FIELD_TYPES: dict[str, Any] = {"number": float, "bool": bool, "json": Any, "geoPoint": dict[str, float]}
+_MULTIPLE_FIELDS = {"select", "relation", "file"}
+
+
+def get_field(record: Any, name: str, default: Any = None) -> Any:
+    """Reads a field of a record, whether it is a `dict` or an object decoded with a `record_type`."""
+    if isinstance(record, Mapping):
+        return record.get(name, default)
+    return getattr(record, name, default)
+
+
+def convert(value: Any, decode_as: Any) -> Any:
+    """Converts decoded JSON to `decode_as`: a dataclass, msgspec type, TypedDict or a list or `ListResult` of one."""
+    origin = get_origin(decode_as)
+
+    if origin is list:
+        (item_type,) = get_args(decode_as)
+        return [convert(item, item_type) for item in value]
+    elif origin is ListResult:
+        (item_type,) = get_args(decode_as)
+        return {**value, "items": [convert(item, item_type) for item in value["items"]]}
+    elif is_dataclass(decode_as) and isinstance(decode_as, type):
+        names = _field_names(decode_as)
+        return decode_as(**{key: item for key, item in value.items() if key in names})
+    elif decode_as is Any or is_typeddict(decode_as):
+        return value
+
+    import msgspec
+
+    return msgspec.convert(value, decode_as)
+
+
+@cache
+def _field_names(cls: type) -> frozenset[str]:
+    return frozenset(field.name for field in fields(cls) if field.init)
+
+
+def record_type_from_collection(collection: CollectionModel, name: str | None = None) -> type:
+    """
+    Generates a slots dataclass for the records of a collection, to pass as `record_type` to `PocketBase.collection`.
+
+    Every field except `id` is optional, so responses that leave fields out (e.g. with the `fields` param) still
+    decode. Fields whose name is not a valid Python identifier are skipped.
+
+    Example:
+        Post = record_type_from_collection(await pb.collections.get_one("posts"))
+        posts = pb.collection("posts", Post)
+    """
+
+    annotations: list[tuple[str, Any, Any]] = [
+        ("collectionId", str | None, None),
+        ("collectionName", str | None, None),
+    ]
+
+    # Since PocketBase 0.23 field options are stored on the field itself
+    for field in cast(list[Mapping[str, Any]], collection["fields"]):
+        if field["name"] == "id" or field.get("hidden") or not _is_attribute_name(field["name"]):
+            continue
+
+        options: Mapping[str, Any] = field.get("options") or {}
+        max_select = field.get("maxSelect", options.get("maxSelect", 1)) or 1
+        field_type = _FIELD_TYPES.get(field["type"], str)
+
+        if field["type"] in _MULTIPLE_FIELDS and max_select > 1:
+            field_type = list[str]
+
+        annotations.append((field["name"], field_type | None, None))
+
+    annotations.append(("expand", dict[str, Any] | None, None))
+    return make_dataclass(name or collection["name"], [("id", str), *annotations], slots=True)
+
+
+def _is_attribute_name(name: str) -> bool:
+    return name.isidentifier() and not keyword.iskeyword(name)
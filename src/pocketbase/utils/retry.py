@@ -0,0 +1,78 @@
+import random
+from collections.abc import AsyncIterable, Iterator
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from time import monotonic
+
+from pocketbase.models.errors import PocketBaseCircuitOpenError
+from pocketbase.models.options import RetryOptions, SendOptions
+
+
+class RetryPolicy:
+    """
+    Decides which requests are retried and how long to wait, and fails fast while the server is unhealthy.
+
+    The circuit opens after `circuit_failures` consecutive transport errors or 5xx responses. While open, requests
+    raise `PocketBaseCircuitOpenError` without being sent. After `circuit_reset` seconds a single request is let
+    through to probe the server, and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, options: RetryOptions) -> None:
+        self.retries = options.get("retries", 3)
+        self.backoff = options.get("backoff", 0.5)
+        self.max_backoff = options.get("max_backoff", 30.0)
+        self.methods = frozenset(options.get("methods", ("GET", "PUT", "DELETE")))
+        self.statuses = frozenset(options.get("statuses", (429, 502, 503, 504)))
+        self.circuit_failures = options.get("circuit_failures", 5)
+        self.circuit_reset = options.get("circuit_reset", 30.0)
+        self._failures = 0
+        self._open_until: float | None = None
+
+    def attempts(self, options: SendOptions) -> int:
+        """The number of retries allowed for a request, 0 if it must not be retried."""
+        content = options.get("content")
+        if isinstance(content, AsyncIterable | Iterator):
+            # Streamed content cannot be sent a second time
+            return 0
+        return self.retries if options.get("retry", options.get("method", "GET") in self.methods) else 0
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """Seconds to wait before retry number `attempt` (from 0), honouring a `Retry-After` header."""
+        if retry_after:
+            seconds = self._parse_retry_after(retry_after)
+            if seconds is not None:
+                return seconds
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def check(self, url: str) -> None:
+        if self._open_until is None:
+            return
+
+        now = monotonic()
+        if now < self._open_until:
+            raise PocketBaseCircuitOpenError(
+                url,
+                503,
+                {"code": 503, "message": "Not sending requests while the server is unhealthy.", "data": {}},
+            )
+        # Let this request probe the server, the others keep failing fast until it completes
+        self._open_until = now + self.circuit_reset
+
+    def record(self, healthy: bool) -> None:
+        if healthy:
+            self._failures = 0
+            self._open_until = None
+            return
+
+        self._failures += 1
+        if self.circuit_failures and self._failures >= self.circuit_failures:
+            self._open_until = monotonic() + self.circuit_reset
+
+    @staticmethod
+    def _parse_retry_after(value: str) -> float | None:
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            return max((parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds(), 0.0)
+        except (TypeError, ValueError):
+            return None
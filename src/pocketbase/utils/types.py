@@ -16,17 +16,30 @@ BodyField: TypeAlias = JsonType | FileUpload | datetime
 BodyDict: TypeAlias = dict[str, BodyField]
 
 
-def transform(data: BodyDict) -> tuple[dict[str, JsonType], SendableFiles]:
+def format_datetime(value: datetime) -> str:
+    if value.tzinfo is None:
+        return value.isoformat(timespec="milliseconds") + "Z"
+    return value.astimezone(UTC).isoformat(timespec="milliseconds").split("+")[0] + "Z"
+
+
+def split_files(data: BodyDict) -> tuple[BodyDict, SendableFiles]:
+    """Moves the `FileUpload` values out of `data`, leaving the fields to be sent as JSON."""
     files: SendableFiles = []
 
     for key, value in list(data.items()):
-        if isinstance(value, datetime):
-            if value.tzinfo is None:
-                data[key] = value.isoformat(timespec="milliseconds") + "Z"
-            else:
-                data[key] = value.astimezone(UTC).isoformat(timespec="milliseconds").split("+")[0] + "Z"
-        elif isinstance(value, FileUpload) and value.files:
+        if isinstance(value, FileUpload) and value.files:
             files.extend((key, file) for file in value.files)
             del data[key]
 
+    return data, files
+
+
+def transform(data: BodyDict) -> tuple[dict[str, JsonType], SendableFiles]:
+    """Like `split_files`, also formatting dates for multipart form data."""
+    data, files = split_files(data)
+
+    for key, value in data.items():
+        if isinstance(value, datetime):
+            data[key] = format_datetime(value)
+
     return cast(dict[str, JsonType], data), files
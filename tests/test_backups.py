@@ -1,4 +1,7 @@
 import asyncio
+from pathlib import Path
+
+import httpx
 
 from pocketbase import PocketBase
 
@@ -30,3 +33,82 @@ async def test_backups(superuser_client: PocketBase):
     # This takes a couple seconds and can disturb the next test
     await superuser_client.backups.restore("test.zip")
     await asyncio.sleep(5)
+
+
+async def test_backup_streaming(superuser_client: PocketBase, tmp_path: Path):
+    await superuser_client.backups.create("stream.zip")
+    target = tmp_path / "stream.zip"
+    size = await superuser_client.backups.download_to("stream.zip", target)
+    assert size == target.stat().st_size
+
+    chunks = [chunk async for chunk in superuser_client.backups.stream("stream.zip")]
+    assert b"".join(chunks) == target.read_bytes()
+
+    progress: list[tuple[int, int | None]] = []
+    await superuser_client.backups.upload_stream(
+        "stream2.zip", target, progress=lambda sent, total: progress.append((sent, total)), chunk_size=4096
+    )
+    assert progress[-1] == (size, size)
+    assert any(b["key"] == "stream2.zip" and b["size"] == size for b in await superuser_client.backups.get_full_list())
+
+    await superuser_client.backups.delete("stream.zip")
+    await superuser_client.backups.delete("stream2.zip")
+
+
+async def chunked(data: bytes, fail: bool):
+    for i in range(0, len(data), 256):
+        if fail and i >= 512:
+            raise httpx.ReadError("connection lost")
+        yield data[i : i + 256]
+
+
+async def test_backup_download_to_sink_resumes():
+    content = bytes(range(256)) * 8
+    requests = 0
+    tokens: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal requests
+        if request.url.path == "/api/files/token":
+            return httpx.Response(200, json={"token": f"token{requests}"})
+        if request.url.path == "/api/backups":
+            return httpx.Response(200, json=[{"key": "a.zip", "size": len(content), "modified": ""}])
+        requests += 1
+        tokens.append(request.url.params["token"])
+        if "Range" in request.headers:
+            start = int(request.headers["Range"][6:-1])
+            return httpx.Response(206, content=chunked(content[start:], False))
+        return httpx.Response(200, content=chunked(content, True))
+
+    pb = PocketBase("http://bla.com")
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+
+    received: list[bytes] = []
+
+    async def sink(chunk: bytes) -> None:
+        received.append(chunk)
+
+    assert await pb.backups.download_to("a.zip", sink) == len(content)
+    assert b"".join(received) == content
+    assert requests == 2
+    # The resumed request has a token of its own
+    assert tokens == ["token0", "token1"]
+
+
+async def test_backup_upload_stream():
+    uploaded: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        uploaded.append(request.content)
+        return httpx.Response(204)
+
+    pb = PocketBase("http://bla.com")
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+
+    async def source():
+        yield b"abc"
+        yield b"def"
+
+    await pb.backups.upload_stream("b.zip", source())
+    assert b'filename="b.zip"' in uploaded[0]
+    assert b"\r\n\r\nabcdef\r\n--" in uploaded[0]
@@ -0,0 +1,200 @@
+import json
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from pocketbase import FileUpload, PocketBase
+from pocketbase.models.dtos import CollectionModel
+from pocketbase.models.errors import PocketBaseBadRequestError, PocketBaseBatchError
+
+
+@pytest.fixture
+async def collection(superuser_client: PocketBase) -> CollectionModel:
+    await superuser_client._settings.update(body={"batch": {"enabled": True, "maxRequests": 50, "timeout": 3}})
+    return await superuser_client.collections.create(
+        {
+            "name": uuid4().hex,
+            "type": "base",
+            "fields": [
+                {"name": "title", "type": "text", "required": True},
+                {"name": "image", "type": "file", "maxSelect": 1, "maxSize": 5242880},
+            ],
+        }
+    )
+
+
+async def test_batch(superuser_client: PocketBase, collection: CollectionModel):
+    existing = await superuser_client.collection(collection["id"]).create({"title": "a"})
+    removed = await superuser_client.collection(collection["id"]).create({"title": "b"})
+
+    batch = superuser_client.create_batch()
+    col = batch.collection(collection["id"])
+    col.create({"title": "c"})
+    col.create({"title": "d", "image": FileUpload(("d.txt", b"hello", "text/plain"))})
+    col.update(existing["id"], {"title": "e"})
+    col.upsert({"id": existing["id"], "title": "f"})
+    col.delete(removed["id"])
+    results = await batch.send()
+
+    assert [r["status"] for r in results] == [200, 200, 200, 200, 204]
+    assert results[0]["body"]["title"] == "c"
+    assert results[1]["body"]["image"].startswith("d")
+    assert results[3]["body"]["title"] == "f"
+    assert len(batch) == 0
+    assert len(await superuser_client.collection(collection["id"]).get_full_list()) == 3
+
+
+async def test_batch_error(superuser_client: PocketBase, collection: CollectionModel):
+    batch = superuser_client.create_batch()
+    batch.collection(collection["id"]).create({"title": "a"})
+    failing = batch.collection(collection["id"]).create({})
+
+    with pytest.raises(PocketBaseBatchError) as exc:
+        await batch.send()
+
+    assert list(exc.value.errors) == [failing]
+    assert exc.value.errors[failing].status == 400
+    # transactional: nothing was created
+    assert await superuser_client.collection(collection["id"]).get_full_list() == []
+
+
+async def test_batch_chunks():
+    sent: list[list[dict]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests = json.loads(request.content)["requests"]
+        sent.append(requests)
+        if any(r["body"]["title"] == "fail" for r in requests):
+            index = next(i for i, r in enumerate(requests) if r["body"]["title"] == "fail")
+            return httpx.Response(
+                400,
+                json={
+                    "status": 400,
+                    "message": "Batch transaction failed.",
+                    "data": {
+                        "requests": {
+                            str(index): {
+                                "code": "batch_request_failed",
+                                "message": "Batch request failed.",
+                                "response": {"status": 404, "message": "Missing.", "data": {}},
+                            }
+                        }
+                    },
+                },
+            )
+        return httpx.Response(200, json=[{"status": 200, "body": r["body"]} for r in requests])
+
+    pb = PocketBase("http://bla.com")
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+
+    batch = pb.create_batch()
+    for i in range(7):
+        batch.collection("test").create({"title": str(i)}, {"params": {"expand": "rel"}})
+
+    results = await batch.send({"max_requests": 3})
+    assert [len(s) for s in sent] == [3, 3, 1]
+    assert [r["body"]["title"] for r in results] == [str(i) for i in range(7)]
+    assert sent[0][0]["url"] == "/api/collections/test/records?expand=rel"
+
+    for title in ["0", "1", "2", "3", "fail"]:
+        batch.collection("test").create({"title": title})
+
+    with pytest.raises(PocketBaseBadRequestError) as exc:
+        await batch.send({"max_requests": 3})
+
+    assert isinstance(exc.value, PocketBaseBatchError)
+    assert list(exc.value.errors) == [4]
+    assert exc.value.errors[4].status == 404
+    # the first chunk was committed, the failing chunk stays queued
+    assert len(batch) == 2
+    assert exc.value.sent == 3
+    assert [r["body"]["title"] for r in exc.value.results] == ["0", "1", "2"]
+
+    # a transport error also keeps only the chunks that were not committed
+    batch = pb.create_batch()
+    for title in ["0", "1", "2", "disconnect"]:
+        batch.collection("test").create({"title": title})
+
+    def disconnecting(request: httpx.Request) -> httpx.Response:
+        if b"disconnect" in request.content:
+            raise httpx.ReadError("disconnected")
+        return handler(request)
+
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(disconnecting))
+    with pytest.raises(httpx.ReadError) as read_error:
+        await batch.send({"max_requests": 3})
+    assert len(batch) == 1
+    assert read_error.value.sent == 3  # type: ignore[attr-defined]
+    assert len(read_error.value.results) == 3  # type: ignore[attr-defined]
+
+
+async def test_bulk_create(superuser_client: PocketBase, collection: CollectionModel):
+    async def rows():
+        for i in range(25):
+            yield {} if i in (3, 17) else {"title": f"t{i}"}
+
+    done: list[int] = []
+    col = superuser_client.collection(collection["id"])
+    result = await col.bulk_create(rows(), concurrency=3, batch_size=5, progress=done.append)
+
+    assert result["created"] == 23
+    assert sorted(f["index"] for f in result["failed"]) == [3, 17]
+    assert all(f["error"].status == 400 for f in result["failed"])
+    assert done[-1] == 25
+    assert len(await col.get_full_list()) == 23
+
+
+async def test_bulk_create_retries_without_failed_rows():
+    created: list[str] = []
+    sizes: list[int] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests = json.loads(request.content)["requests"]
+        sizes.append(len(requests))
+        failed = {str(i): {"code": "", "message": ""} for i, r in enumerate(requests) if not r["body"]}
+        if failed:
+            return httpx.Response(400, json={"code": 400, "message": "", "data": {"requests": failed}})
+        created.extend(r["body"]["title"] for r in requests)
+        return httpx.Response(200, json=[{"status": 200, "body": r["body"]} for r in requests])
+
+    pb = PocketBase("http://bla.com")
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+
+    rows = [{} if i in (1, 3) else {"title": str(i)} for i in range(6)]
+    result = await pb.collection("test").bulk_create(rows, concurrency=2, batch_size=4)
+
+    assert result["created"] == 4
+    assert [f["index"] for f in result["failed"]] == [1, 3]
+    assert sorted(created) == ["0", "2", "4", "5"]
+    assert sorted(sizes) == [2, 2, 4]
+
+
+async def test_bulk_create_transport_errors_and_upsert():
+    methods: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path != "/api/batch":
+            if json.loads(request.content)["title"] == "1":
+                raise httpx.ReadTimeout("timed out")
+            return httpx.Response(200, json={})
+        requests = json.loads(request.content)["requests"]
+        methods.extend(r["method"] for r in requests)
+        if any(r["body"]["title"] == "4" for r in requests):
+            raise httpx.ReadError("disconnected")
+        return httpx.Response(200, json=[{"status": 200, "body": r["body"]} for r in requests])
+
+    pb = PocketBase("http://bla.com")
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+
+    # A transport error fails the rows of its request, the other requests go on
+    result = await pb.collection("test").bulk_create([{"title": str(i)} for i in range(3)])
+    assert result["created"] == 2
+    assert [f["index"] for f in result["failed"]] == [1]
+    assert isinstance(result["failed"][0]["error"], httpx.ReadTimeout)
+
+    # Upserts, including a single row chunk, are sent as batch upserts
+    result = await pb.collection("test").bulk_create([{"title": str(i)} for i in range(5)], batch_size=2, upsert=True)
+    assert result["created"] == 4
+    assert [f["index"] for f in result["failed"]] == [4]
+    assert methods == ["PUT"] * 5
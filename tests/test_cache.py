@@ -0,0 +1,39 @@
+from time import sleep
+
+from pocketbase.utils.cache import LRUCache
+
+
+def test_lru_eviction_and_expiry():
+    cache: LRUCache[str] = LRUCache(2)
+    cache.set("a", (), "a", None)
+    cache.set("b", (), "b", 0.01)
+    assert cache.get("a", ()) == (True, "a")
+    cache.set("c", (), "c", None)
+
+    # "b" was least recently used
+    assert cache.get("b", ()) == (False, None)
+    assert cache.stats == {"hits": 1, "misses": 1, "evictions": 1, "size": 2}
+
+    cache.set("d", (), "d", 0.01)
+    sleep(0.02)
+    assert cache.get("d", ()) == (False, None)
+    assert cache.stats["size"] == 1
+
+
+def test_invalidation_races():
+    cache: LRUCache[str] = LRUCache(2)
+    cache.set("a", (), "a", None)
+    cache.set("a", ("expand", "rel"), "a+rel", None)
+    cache.invalidate("a")
+    assert cache.get("a", ()) == (False, None)
+    assert cache.get("a", ("expand", "rel")) == (False, None)
+
+    # A fetch that started before an invalidation is not stored
+    version = cache.version
+    cache.invalidate("a")
+    cache.set("a", (), "stale", None, version)
+    assert cache.get("a", ()) == (False, None)
+
+    version = cache.version
+    cache.set("a", (), "fresh", None, version)
+    assert cache.get("a", ()) == (True, "fresh")
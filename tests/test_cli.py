@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+
+import httpx
+
+from pocketbase import PocketBase
+from pocketbase.cli import parser, run
+
+RECORDS = [{"id": f"r{i}", "collectionName": "posts", "title": f"post {i}", "tags": ["a", "b"]} for i in range(7)]
+
+
+def mock_client(handler) -> PocketBase:
+    pb = PocketBase("http://bla.com")
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+    return pb
+
+
+async def list_handler(request: httpx.Request) -> httpx.Response:
+    after = request.url.params.get("filter", "id > ''").split("'")[-2]
+    items = [r for r in RECORDS if r["id"] > after][: int(request.url.params["perPage"])]
+    return httpx.Response(200, json={"page": 1, "perPage": 3, "totalItems": -1, "totalPages": -1, "items": items})
+
+
+async def test_export_resumes(tmp_path: Path):
+    output, checkpoint = tmp_path / "posts.ndjson", tmp_path / "posts.ckpt"
+    output.write_text("".join(json.dumps(r) + "\n" for r in RECORDS[:3]))
+    checkpoint.write_text(json.dumps({"last_id": "r2", "rows": 3}))
+
+    args = parser().parse_args(["export", "posts", "-o", str(output), "--batch", "3", "--checkpoint", str(checkpoint)])
+    assert await run(args, mock_client(list_handler)) == 0
+
+    assert [json.loads(line) for line in output.read_text().splitlines()] == RECORDS
+    assert json.loads(checkpoint.read_text())["rows"] == 7
+
+
+async def test_export_fields_without_id(tmp_path: Path):
+    requested: list[str] = []
+
+    async def fields_handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.params["fields"])
+        response = await list_handler(request)
+        items = [{key: r[key] for key in requested[-1].split(",")} for r in response.json()["items"]]
+        return httpx.Response(200, json={**response.json(), "items": items})
+
+    output = tmp_path / "posts.ndjson"
+    args = parser().parse_args(["export", "posts", "-o", str(output), "--batch", "3", "--fields", "title"])
+    assert await run(args, mock_client(fields_handler)) == 0
+
+    # The id is fetched to page through the records, but not exported
+    assert requested == ["title,id"] * 3
+    assert [json.loads(line) for line in output.read_text().splitlines()] == [{"title": r["title"]} for r in RECORDS]
+
+
+async def test_export_import_csv(tmp_path: Path):
+    output = tmp_path / "posts.csv"
+    args = parser().parse_args(["export", "posts", "-o", str(output), "--fields", "id,title,tags"])
+    assert await run(args, mock_client(list_handler)) == 0
+    assert output.read_text().splitlines()[:2] == ["id,title,tags", 'r0,post 0,"[""a"", ""b""]"']
+
+    bodies: list = []
+
+    async def batch_handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path != "/api/batch":
+            # The last chunk holds a single row, which is created directly
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json=bodies[-1])
+        requests = json.loads(request.content)["requests"]
+        bodies.extend(r["body"] for r in requests)
+        return httpx.Response(200, json=[{"status": 200, "body": r["body"]} for r in requests])
+
+    checkpoint = tmp_path / "import.ckpt"
+    args = parser().parse_args(
+        [
+            "import",
+            "posts",
+            "-i",
+            str(output),
+            "--batch-size",
+            "2",
+            "--concurrency",
+            "2",
+            "--checkpoint",
+            str(checkpoint),
+        ]
+    )
+    assert await run(args, mock_client(batch_handler)) == 0
+    assert sorted(bodies, key=lambda b: b["id"]) == [{k: r[k] for k in ("id", "title", "tags")} for r in RECORDS]
+    assert json.loads(checkpoint.read_text()) == {"rows": 7}
+
+
+async def test_import_upsert(tmp_path: Path):
+    source = tmp_path / "posts.ndjson"
+    source.write_text("".join(json.dumps(r) + "\n" for r in RECORDS))
+    methods: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/api/batch"
+        requests = json.loads(request.content)["requests"]
+        methods.extend(r["method"] for r in requests)
+        return httpx.Response(200, json=[{"status": 200, "body": r["body"]} for r in requests])
+
+    args = parser().parse_args(["import", "posts", "-i", str(source), "--batch-size", "2", "--upsert"])
+    assert await run(args, mock_client(handler)) == 0
+    # The last chunk holds a single row, it is upserted too
+    assert methods == ["PUT"] * 7
+
+
+async def test_import_failures(tmp_path: Path):
+    source = tmp_path / "posts.ndjson"
+    source.write_text("".join(json.dumps(r) + "\n" for r in RECORDS))
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if json.loads(request.content)["id"] == "r3":
+            return httpx.Response(400, json={"code": 400, "message": "Failed to create record.", "data": {}})
+        return httpx.Response(200, json={})
+
+    args = parser().parse_args(["import", "posts", "-i", str(source)])
+    assert await run(args, mock_client(handler)) == 1
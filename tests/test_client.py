@@ -0,0 +1,214 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+
+import httpx
+import pytest
+
+from pocketbase import FileUpload, PocketBase, PocketBaseError
+from pocketbase.client import PocketBaseInners
+from pocketbase.models.errors import PocketBaseCircuitOpenError
+
+
+async def test_transport_options(client_url: str):
+    pb = PocketBase(
+        client_url, {"max_connections": 2, "keepalive_expiry": 1, "timeout": 10, "realtime_max_connections": 1}
+    )
+    assert pb._inners.realtime_client is not pb._inners.client
+
+    results = await asyncio.gather(*(pb.health.check() for _ in range(5)))
+    assert all(r["code"] == 200 for r in results)
+
+    with pytest.raises(httpx.TimeoutException):
+        await pb.health.check({"timeout": 0.000001})
+
+
+async def test_unix_domain_socket(tmp_path: Path):
+    async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        request = await reader.readuntil(b"\r\n\r\n")
+        body = json.dumps({"code": 200, "message": request.split(b" ")[1].decode(), "data": {}}).encode()
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n")
+        writer.write(b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+        await writer.drain()
+        writer.close()
+
+    socket = str(tmp_path / "pb.sock")
+    server = await asyncio.start_unix_server(serve, socket)
+
+    async with server:
+        pb = PocketBase("http://localhost", {"uds": socket})
+        health = await pb.health.check()
+
+    assert health["message"] == "/api/health"
+
+
+async def test_inner_class_signature():
+    class OldInners(PocketBaseInners):
+        def __init__(self, pocketbase: PocketBase, base_url: str) -> None:
+            super().__init__(pocketbase, base_url)
+            self.custom = True
+
+    class OldPocketBase(PocketBase):
+        _inner_cls_ = OldInners
+
+    # Subclasses from before the client settings still work as long as those are not used
+    pb = OldPocketBase("http://bla.com")
+    assert isinstance(pb._inners, OldInners)
+    assert pb._inners.inflight is None
+
+    with pytest.raises(TypeError):
+        OldPocketBase("http://bla.com", coalesce_requests=True)
+
+    # The settings are passed by keyword
+    class NewInners(PocketBaseInners):
+        def __init__(self, pocketbase: PocketBase, base_url: str, **settings: Any) -> None:
+            super().__init__(pocketbase, base_url, **settings)
+            self.settings = settings
+
+    class NewPocketBase(PocketBase):
+        _inner_cls_ = NewInners
+
+    pb = NewPocketBase("http://bla.com", coalesce_requests=True, retry={})
+    assert pb._inners.settings == {"coalesce_requests": True, "retry": {}}  # type: ignore[attr-defined]
+    assert pb._inners.retry is not None
+
+
+async def test_coalesce_requests():
+    requests: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"id": request.url.path.rsplit("/", 1)[1]})
+
+    pb = PocketBase("http://bla.com", coalesce_requests=True)
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+    col = pb.collection("test")
+
+    cancelled = asyncio.create_task(col.get_one("a"))
+    await asyncio.sleep(0)
+    results = await asyncio.gather(*(col.get_one("a") for _ in range(10)), col.get_one("b"), cancel_after(cancelled))
+
+    assert requests == ["/api/collections/test/records/a", "/api/collections/test/records/b"]
+    assert all(r is results[0] for r in results[:10])
+    assert results[10] == {"id": "b"}
+
+    # Once completed, the next request goes to the server again
+    await col.get_one("a")
+    assert len(requests) == 3
+
+
+async def test_coalesce_full_list():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.01)
+        page = int(request.url.params["page"])
+        items = [{"id": f"r{i}"} for i in range(page * 2 - 2, page * 2)]
+        return httpx.Response(200, json={"page": page, "perPage": 2, "totalPages": 3, "totalItems": 6, "items": items})
+
+    pb = PocketBase("http://bla.com", coalesce_requests=True)
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+    col = pb.collection("test")
+
+    # Both share the requests, not the lists they return
+    a, b = await asyncio.gather(*(col.get_full_list({"batch": 2, "concurrency": 2}) for _ in range(2)))
+    assert a == b == [{"id": f"r{i}"} for i in range(6)]
+    assert a is not b
+
+
+async def cancel_after(task: asyncio.Task) -> None:
+    task.cancel()
+
+
+async def test_retry_policy():
+    responses = [httpx.Response(503, headers={"Retry-After": "0"}, json={}), httpx.ConnectError("down")]
+    requests: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.method)
+        response = responses.pop(0) if responses else httpx.Response(200, json={"id": "a"})
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    pb = PocketBase("http://bla.com", retry={"backoff": 0.01})
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+    col = pb.collection("test")
+
+    assert await col.get_one("a") == {"id": "a"}
+    assert requests == ["GET"] * 3
+
+    # POST is only retried when asked to
+    responses.append(httpx.Response(503, json={}))
+    with pytest.raises(PocketBaseError):
+        await col.create({"title": "x"})
+    responses.append(httpx.Response(503, json={}))
+    assert await col.create({"title": "x"}, {"retry": True}) == {"id": "a"}
+    assert requests[3:] == ["POST"] * 3
+
+
+async def test_retry_file_upload():
+    bodies: list[bytes] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Content-Type"].startswith("multipart/form-data")
+        bodies.append(request.read())
+        return httpx.Response(503 if len(bodies) == 1 else 200, json={"id": "a"})
+
+    pb = PocketBase("http://bla.com", retry={"backoff": 0})
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+    body = {"title": "x", "file": FileUpload(("a.txt", b"hello file", "text/plain"))}
+
+    assert await pb.collection("test").create(body, {"retry": True}) == {"id": "a"}
+    # The retried request carries the file again and the caller's body is left alone
+    assert len(bodies) == 2
+    assert all(b"hello file" in content for content in bodies)
+    assert "file" in body
+
+
+async def test_circuit_breaker():
+    requests: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.method)
+        return httpx.Response(502 if len(requests) <= 4 else 200, json={"code": 200, "message": "", "data": {}})
+
+    pb = PocketBase("http://bla.com", retry={"retries": 1, "backoff": 0, "circuit_failures": 4, "circuit_reset": 0.1})
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+
+    for _ in range(2):
+        with pytest.raises(PocketBaseError):
+            await pb.health.check()
+    with pytest.raises(PocketBaseCircuitOpenError):
+        await pb.health.check()
+    assert len(requests) == 4
+
+    # After the reset period a probe request closes the circuit again
+    await asyncio.sleep(0.1)
+    assert (await pb.health.check())["code"] == 200
+    assert (await pb.health.check())["code"] == 200
+
+
+async def test_rate_limits():
+    in_flight: list[int] = [0]
+    peak: dict[str, int] = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        in_flight[0] += 1
+        peak[request.url.path] = max(peak.get(request.url.path, 0), in_flight[0])
+        await asyncio.sleep(0.02)
+        in_flight[0] -= 1
+        return httpx.Response(200, json={"id": "a"})
+
+    limits: dict = {"/api/collections/*/records": {"concurrency": 2}, "/api/health": {"rate": 50, "burst": 2}}
+    pb = PocketBase("http://bla.com", rate_limits=limits)
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+
+    await asyncio.gather(*(pb.collection("test").get_one("a") for _ in range(6)))
+    assert peak["/api/collections/test/records/a"] == 2
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(*(pb.health.check() for _ in range(7)))
+    # Two requests go out in a burst, the other five are spaced 1/50s apart
+    assert loop.time() - start >= 0.1
@@ -0,0 +1,109 @@
+import json
+from contextlib import suppress
+from dataclasses import fields
+from datetime import UTC, datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from pocketbase import FileUpload, PocketBase
+from pocketbase.utils.codec import JsonCodec, MsgspecCodec, OrjsonCodec, StdlibCodec, default_codec
+from pocketbase.utils.records import record_type_from_collection
+
+
+def available_codecs() -> list[JsonCodec]:
+    codecs: list[JsonCodec] = [StdlibCodec()]
+    for codec in (OrjsonCodec, MsgspecCodec):
+        with suppress(ImportError):
+            codecs.append(codec())
+    return codecs
+
+
+@pytest.mark.parametrize("codec", available_codecs(), ids=lambda c: type(c).__name__)
+def test_codec_roundtrip(codec: JsonCodec):
+    value = {"title": "ü", "count": 1, "tags": ["a", None], "nested": {"ok": True}}
+    assert codec.loads(codec.dumps(value)) == value
+
+    aware = datetime(2024, 1, 2, 5, 4, 5, 123000, tzinfo=timezone(timedelta(hours=2)))
+    decoded = codec.loads(codec.dumps({"date": aware}))["date"]
+    assert datetime.fromisoformat(decoded) == aware.astimezone(UTC)
+
+    # All codecs send the same dates as format_datetime
+    dates = {"naive": datetime(2024, 1, 2, 3, 4, 5, 123456), "aware": aware, "list": [datetime(2024, 1, 2)]}
+    assert codec.dumps(dates) == StdlibCodec().dumps(dates)
+    assert json.loads(codec.dumps(dates))["naive"] == "2024-01-02T03:04:05.123Z"
+
+    with pytest.raises(ValueError):
+        codec.loads(b"{invalid")
+
+
+def test_default_codec():
+    # msgspec decodes typed records directly, so it is preferred
+    pytest.importorskip("msgspec")
+    assert isinstance(default_codec(), MsgspecCodec)
+
+
+async def test_request_encoding():
+    requests: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"id": "a"})
+
+    pb = PocketBase("http://bla.com", codec=StdlibCodec())
+    assert isinstance(pb._inners.codec, StdlibCodec)
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+    col = pb.collection("test")
+
+    await col.create({"title": "x", "date": datetime(2024, 1, 2, 3, 4, 5)})
+    assert requests[0].headers["Content-Type"] == "application/json"
+    assert json.loads(requests[0].content) == {"title": "x", "date": "2024-01-02T03:04:05.000Z"}
+
+    await col.create({"date": datetime(2024, 1, 2, 3, 4, 5), "file": FileUpload(("a.txt", b"hello", "text/plain"))})
+    assert requests[1].headers["Content-Type"].startswith("multipart/form-data")
+    assert b"2024-01-02T03:04:05.000Z" in requests[1].read()
+
+
+@pytest.mark.parametrize("codec", available_codecs(), ids=lambda c: type(c).__name__)
+async def test_record_type(codec: JsonCodec):
+    records = [{"id": f"r{i}", "collectionName": "posts", "title": f"post {i}", "tags": ["a"]} for i in range(5)]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/records"):
+            after = request.url.params.get("filter", "(id > '')").split("'")[1]
+            items = [r for r in records if r["id"] > after][:2]
+            return httpx.Response(
+                200, json={"page": 1, "perPage": 2, "totalItems": -1, "totalPages": -1, "items": items}
+            )
+        return httpx.Response(200, json=records[0])
+
+    Post = record_type_from_collection(
+        {
+            "id": "c",
+            "name": "posts",
+            "type": "base",
+            "system": False,
+            "indexes": [],
+            "options": {},
+            "fields": [
+                {"id": "1", "name": "id", "type": "text", "system": True, "required": True, "presentable": False},
+                {"id": "2", "name": "title", "type": "text", "system": False, "required": False, "presentable": False},
+                {"id": "3", "name": "tags", "type": "select", "maxSelect": 3, "system": False},  # type: ignore
+                {"id": "4", "name": "class", "type": "text", "system": False},  # type: ignore
+            ],
+        }
+    )
+    assert [f.name for f in fields(Post)] == ["id", "collectionId", "collectionName", "title", "tags", "expand"]
+    assert not hasattr(Post(id="x"), "__dict__")
+
+    pb = PocketBase("http://bla.com", codec=codec)
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+    posts = pb.collection("posts", Post)
+    assert pb.collection("posts") is not posts
+
+    post = await posts.get_one("r0")
+    assert post == Post(id="r0", collectionName="posts", title="post 0", tags=["a"])
+
+    all_posts = await posts.get_full_list({"batch": 2, "cursor": "id"})
+    assert [p.id for p in all_posts] == [r["id"] for r in records]
+    assert all(isinstance(p, Post) for p in all_posts)
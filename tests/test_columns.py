@@ -0,0 +1,82 @@
+import math
+import re
+from array import array
+
+import httpx
+import pytest
+
+from pocketbase import PocketBase
+from pocketbase.utils.columns import ColumnBuilder, DictionaryColumn
+
+
+def build(values: list, numpy: bool = False):
+    builder = ColumnBuilder()
+    for value in values:
+        builder.append(value)
+    return builder.build(numpy)
+
+
+def test_column_builder():
+    assert build([1, 2, 3]) == array("q", [1, 2, 3])
+    assert build([True, False]) == array("b", [1, 0])
+
+    floats = build([None, 1, 2.5])
+    assert floats.typecode == "d" and math.isnan(floats[0]) and list(floats[1:]) == [1.0, 2.5]
+
+    strings = build(["a", "b", None, "a"])
+    assert isinstance(strings, DictionaryColumn)
+    assert list(strings.codes) == [0, 1, -1, 0] and strings.values == ["a", "b"]
+    assert list(strings) == ["a", "b", None, "a"]
+
+    assert build(["a", 1, [2]]) == ["a", 1, [2]]
+    assert build([True, None]) == [True, None]
+    assert build([1, 2**70]) == [1, 2**70]
+    assert build([None, None]) == [None, None]
+
+
+def test_column_builder_numpy():
+    numpy = pytest.importorskip("numpy")
+
+    assert build([1, 2], numpy=True).dtype == numpy.int64
+    assert build([True, False], numpy=True).tolist() == [True, False]
+    assert build(["x", "y", "x"], numpy=True).codes.tolist() == [0, 1, 0]
+
+
+async def test_to_columns():
+    records = [{"id": f"r{i}", "n": i, "score": i / 2, "status": ["open", "closed"][i % 2]} for i in range(5)]
+    params: list[httpx.QueryParams] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        params.append(request.url.params)
+        page, per_page = int(request.url.params["page"]), int(request.url.params["perPage"])
+        items = records[(page - 1) * per_page : page * per_page]
+        return httpx.Response(200, json={"page": page, "perPage": per_page, "items": items})
+
+    pb = PocketBase("http://bla.com")
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+
+    columns = await pb.collection("test").to_columns(["n", "score", "status"], {"batch": 2}, numpy=False)
+    assert columns["n"] == array("q", range(5))
+    assert columns["score"] == array("d", [0, 0.5, 1, 1.5, 2])
+    assert list(columns["status"]) == ["open", "closed", "open", "closed", "open"]
+    assert columns["status"].values == ["open", "closed"]
+    assert all(p["fields"] == "n,score,status,id" for p in params)
+
+
+async def test_to_columns_cursor():
+    records = [{"id": f"r{i}", "n": i, "score": i / 2} for i in range(5)]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        fields = request.url.params["fields"].split(",")
+        after = re.search(r"n < (\d+)", request.url.params.get("filter", ""))
+        items = [r for r in reversed(records) if after is None or r["n"] < int(after.group(1))]
+        items = [{key: r[key] for key in fields} for r in items[: int(request.url.params["perPage"])]]
+        return httpx.Response(200, json={"page": 1, "perPage": len(items), "items": items})
+
+    pb = PocketBase("http://bla.com")
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+
+    columns = await pb.collection("test").to_columns(["score"], {"batch": 2, "cursor": "-n"}, numpy=False)
+    # The cursor field is fetched to page, but not returned
+    assert list(columns) == ["score"]
+    assert columns["score"] == array("d", [2, 1.5, 1, 0.5, 0])
@@ -1,6 +1,10 @@
+import re
+from pathlib import Path
 from random import getrandbits
 from uuid import uuid4
 
+import httpx
+
 from pocketbase import FileUpload, PocketBase
 
 
@@ -110,3 +114,103 @@ async def test_create_without_file_record2(superuser_client: PocketBase):
 
     rel = await col.get_one(record["id"])
     assert len(rel["image"]) == 0
+
+
+async def test_stream_and_download_file(superuser_client: PocketBase, tmp_path: Path):
+    coll = await create_file_collection(superuser_client)
+    col = superuser_client.collection(coll["id"])
+    content = getrandbits(1024 * 64).to_bytes(1024 * 8, "little")
+    record = await col.create({"title": "bla", "image": FileUpload(("a.bin", content, "application/octet-stream"))})
+    filename = record["image"][0]
+
+    chunks = [c async for c in superuser_client.files.stream_file(coll["id"], record["id"], filename, chunk_size=1024)]
+    assert b"".join(chunks) == content
+
+    target = tmp_path / "a.bin"
+    assert await superuser_client.files.download_to(coll["id"], record["id"], filename, target) == len(content)
+    assert target.read_bytes() == content
+
+    target.write_bytes(content[:1000])
+    assert await superuser_client.files.download_to(coll["id"], record["id"], filename, target, resume=True) == len(
+        content
+    )
+    assert target.read_bytes() == content
+
+    target.unlink()
+    assert await superuser_client.files.download_to(coll["id"], record["id"], filename, target, parts=3) == len(content)
+    assert target.read_bytes() == content
+
+
+class FlakyStream(httpx.AsyncByteStream):
+    def __init__(self, content: bytes, fail_after: int | None) -> None:
+        self.content = content
+        self.fail_after = fail_after
+
+    async def __aiter__(self):
+        for i in range(0, len(self.content), 100):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise httpx.ReadError("connection lost")
+            yield self.content[i : i + 100]
+
+
+async def test_download_resumes_interrupted_transfer(tmp_path: Path):
+    content = getrandbits(1024 * 8).to_bytes(1024, "little")
+    ranges: list[str | None] = []
+    if_ranges: list[str | None] = []
+    etag = '"v1"'
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        header = request.headers.get("Range")
+        ranges.append(header)
+        if_ranges.append(request.headers.get("If-Range"))
+        if header is None or request.headers.get("If-Range", etag) != etag:
+            return httpx.Response(200, headers={"ETag": etag}, stream=FlakyStream(content, None if header else 300))
+
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", header)
+        assert match
+        start, end = match.groups()
+        stop = int(end) + 1 if end else len(content)
+        return httpx.Response(
+            206,
+            headers={"Content-Range": f"bytes {start}-{stop - 1}/{len(content)}", "ETag": etag},
+            stream=FlakyStream(content[int(start) : stop], None),
+        )
+
+    pb = PocketBase("http://bla.com")
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+
+    target = tmp_path / "file.bin"
+    assert await pb.files.download_to("col", "rec", "file.bin", target) == len(content)
+    assert target.read_bytes() == content
+    assert ranges == [None, "bytes=300-"]
+    assert if_ranges == [None, '"v1"']
+
+    ranges.clear()
+    assert await pb.files.download_to("col", "rec", "file.bin", target, resume=True) == len(content)
+    assert ranges == ["bytes=0-0"]
+
+    # Without resume an existing file is downloaded again
+    ranges.clear()
+    assert await pb.files.download_to("col", "rec", "file.bin", target) == len(content)
+    assert ranges == [None, "bytes=300-"]
+
+    # The file changed while resuming, the server sends all of it
+    def change(request: httpx.Request) -> httpx.Response:
+        nonlocal etag
+        response = handler(request)
+        etag = '"v2"'
+        return response
+
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(change))
+    ranges.clear()
+    target.unlink()
+    assert await pb.files.download_to("col", "rec", "file.bin", target) == len(content)
+    assert target.read_bytes() == content
+    assert ranges == [None, "bytes=300-"]
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+
+    ranges.clear()
+    target.unlink()
+    assert await pb.files.download_to("col", "rec", "file.bin", target, parts=4) == len(content)
+    assert target.read_bytes() == content
+    assert sorted(ranges[1:]) == ["bytes=0-255", "bytes=256-511", "bytes=512-767", "bytes=768-1023"]
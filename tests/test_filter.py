@@ -0,0 +1,22 @@
+from datetime import UTC, datetime
+
+from pocketbase.utils.filter import format_filter, keyset_filter
+
+
+def test_format_filter():
+    assert (
+        format_filter(
+            "title = {:title} && n > {:n} && ok = {:ok} && d < {:d} && x = {:missing}",
+            {"title": "it's", "n": 5, "ok": True, "d": datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC)},
+        )
+        == "title = 'it\\'s' && n > 5 && ok = true && d < '2024-01-02 03:04:05.000Z' && x = {:missing}"
+    )
+    assert format_filter("a = {:a} && b = {:b}", {"a": "{:b}", "b": "' || 1=1"}) == "a = '{:b}' && b = '\\' || 1=1'"
+
+
+def test_keyset_filter():
+    assert keyset_filter(["id"], {"id": "abc"}) == "(id > 'abc')"
+    assert (
+        keyset_filter(["-created", "+id"], {"created": "2024-01-01 00:00:00.000Z", "id": "abc"})
+        == "(created < '2024-01-01 00:00:00.000Z') || (created = '2024-01-01 00:00:00.000Z' && id > 'abc')"
+    )
@@ -1,15 +1,19 @@
 import asyncio
 import json
+import logging
+from collections.abc import Callable
 from contextlib import asynccontextmanager
 from unittest.mock import MagicMock, patch
-from urllib.parse import quote
+from urllib.parse import quote, unquote
 from uuid import uuid4
 
 import httpx
+import pytest
 from httpx_sse import ServerSentEvent
 
 from pocketbase import PocketBase
-from pocketbase.services.realtime import RealtimeEvent
+from pocketbase.models.options import TransportOptions
+from pocketbase.services.realtime import RealtimeEvent, Subscription
 
 
 async def test_realtime(superuser_client: PocketBase) -> None:
@@ -123,3 +127,438 @@ async def test_realtime_all_records(superuser_client: PocketBase) -> None:
         await unsub()
 
     assert event_counter > 1
+
+
+async def test_replicate(superuser_client: PocketBase) -> None:
+    collection = await superuser_client.collections.create(
+        {
+            "name": uuid4().hex,
+            "type": "base",
+            "fields": [
+                {"name": "title", "type": "text", "required": True},
+                {"name": "updated", "type": "autodate", "onCreate": True, "onUpdate": True},
+            ],
+        }
+    )
+    col = superuser_client.collection(collection["id"])
+    first = await col.create({"title": "a"})
+
+    replica = await col.replicate(indexes=["title"])
+    assert replica.get(first["id"]) == first
+
+    second = await col.create({"title": "b"})
+    await col.update(first["id"], {"title": "b"})
+    await asyncio.sleep(0.2)
+    assert {r["id"] for r in replica.find(title="b")} == {first["id"], second["id"]}
+    assert replica.find(title="a") == []
+
+    await col.delete(second["id"])
+    await asyncio.sleep(0.2)
+    assert second["id"] not in replica
+
+    # Changes missed while disconnected are picked up by a resync
+    await replica.close()
+    third = await col.create({"title": "c"})
+    await col.delete(first["id"])
+    await replica.resync()
+    assert [r["id"] for r in replica] == [third["id"]]
+
+
+class MockRealtime:
+    """Fakes the realtime endpoint: one event queue per SSE connection, events go to clients subscribed to them."""
+
+    def __init__(self) -> None:
+        self.queues: dict[str, asyncio.Queue] = {}
+        self.subscriptions: dict[str, list[str]] = {}
+        self.transmits = 0
+        # Handles the requests other than realtime subscriptions
+        self.handler: Callable[[httpx.Request], httpx.Response] | None = None
+        # Holds back subscription requests until set
+        self.transmit_gate: asyncio.Event | None = None
+        # Raised by the next connection attempts, and the number of subscription requests to fail
+        self.connect_errors: list[Exception] = []
+        self.failing_transmits = 0
+
+    def client(self, transport: TransportOptions | None = None) -> PocketBase:
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path != "/api/realtime":
+                assert self.handler is not None
+                return self.handler(request)
+
+            if self.transmit_gate is not None:
+                await self.transmit_gate.wait()
+            if self.failing_transmits:
+                self.failing_transmits -= 1
+                return httpx.Response(503, json={"message": "Restarting"})
+            body = json.loads(request.content)
+            self.transmits += 1
+            self.subscriptions[body["clientId"]] = body["subscriptions"]
+            return httpx.Response(204)
+
+        pb = PocketBase("http://bla.com", transport)
+        pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+        return pb
+
+    def send(self, topic: str, action: str, record: dict) -> None:
+        data = json.dumps({"action": action, "record": record})
+        for client_id, keys in self.subscriptions.items():
+            for key in keys:
+                if key.split("?options=")[0] == quote(topic):
+                    self.queues[client_id].put_nowait(ServerSentEvent(event=key, data=data, id=client_id))
+
+    def disconnect(self) -> None:
+        for queue in self.queues.values():
+            queue.put_nowait(httpx.ReadError("disconnected"))
+
+    @asynccontextmanager
+    async def aconnect_sse(self, *args, **kwargs):
+        if self.connect_errors:
+            raise self.connect_errors.pop(0)
+        client_id = f"client{len(self.queues)}"
+        queue = self.queues[client_id] = asyncio.Queue()
+
+        async def messages():
+            yield ServerSentEvent(event="PB_CONNECT", data=json.dumps({"clientId": client_id}), id=client_id)
+            while True:
+                item = await queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+
+        mock = MagicMock()
+        mock.aiter_sse.return_value = messages()
+        yield mock
+
+    def patch(self):
+        return patch("pocketbase.services.realtime.aconnect_sse", self.aconnect_sse)
+
+
+async def test_subscription_queues() -> None:
+    server = MockRealtime()
+    pb = server.client()
+    release = asyncio.Event()
+    slow: list[tuple[str, str]] = []
+    fast: list[str] = []
+
+    async def slow_callback(event: RealtimeEvent) -> None:
+        await release.wait()
+        slow.append((event["record"]["id"], event["record"]["title"]))
+
+    async def fast_callback(event: RealtimeEvent) -> None:
+        fast.append(event["record"]["id"])
+
+    with server.patch():
+        unsubscribes = [
+            await pb.realtime.subscribe("posts/*", slow_callback, {"queue_size": 2}),
+            await pb.realtime.subscribe("posts/*", fast_callback),
+            await pb.realtime.subscribe("posts/*", slow_callback, {"queue_size": 2, "overflow": "conflate"}),
+        ]
+
+        for i, record_id in enumerate(["r0", "r1", "r2", "r1", "r3"]):
+            server.send("posts/*", "update", {"id": record_id, "title": str(i)})
+            # Let the workers pick up the first event
+            await asyncio.sleep(0.01 if i == 0 else 0)
+        await asyncio.sleep(0.05)
+
+        # The slow subscriptions do not hold up the fast one
+        assert fast == ["r0", "r1", "r2", "r1", "r3"]
+        stats = pb.realtime.subscription_stats
+        assert [(s["depth"], s["dropped"], s["delivered"]) for s in stats] == [(2, 2, 0), (0, 0, 5), (2, 1, 0)]
+        assert stats[0]["lag"] > 0
+
+        release.set()
+        await asyncio.sleep(0.05)
+        # The first event of each was being handled, the others dropped the oldest (the default) or were conflated
+        assert sorted(slow) == sorted([("r0", "0"), ("r1", "3"), ("r3", "4"), ("r0", "0"), ("r2", "2"), ("r3", "4")])
+
+        await unsubscribes[2]()
+        assert len(pb.realtime.subscription_stats) == 2
+        for unsubscribe in unsubscribes[:2]:
+            await unsubscribe()
+        assert pb.realtime._connections == []
+
+
+async def test_blocked_put_ends_on_stop() -> None:
+    release = asyncio.Event()
+
+    async def callback(event: RealtimeEvent) -> None:
+        await release.wait()
+
+    subscription = Subscription("posts/*", callback, {"queue_size": 1, "overflow": "block"})
+    for i in range(2):
+        await subscription.put({"action": "create", "record": {"id": f"r{i}"}})
+        await asyncio.sleep(0.01)
+
+    # The queue is full and the worker is busy, stopping must not leave the reader waiting for room
+    put = asyncio.create_task(subscription.put({"action": "create", "record": {"id": "r2"}}))
+    await asyncio.sleep(0.01)
+    assert not put.done()
+    await subscription.stop()
+    await asyncio.wait_for(put, 1)
+
+
+async def test_cache_keeps_every_invalidation() -> None:
+    server = MockRealtime()
+    pb = server.client()
+
+    with server.patch():
+        col = pb.collection("posts")
+        await col.enable_cache(ttl=None)
+        # A burst larger than the default queue, none of it may be dropped
+        for i in range(1200):
+            server.send("posts", "update", {"id": f"r{i}"})
+        await asyncio.sleep(0.1)
+
+        assert [(s["dropped"], s["delivered"]) for s in pb.realtime.subscription_stats] == [(0, 1200)]
+        await col.disable_cache()
+
+
+async def test_event_stream() -> None:
+    server = MockRealtime()
+    pb = server.client()
+
+    with server.patch():
+        async with pb.collection("orders").events(filter="status = 'paid'", buffer=10) as events:
+            (key,) = server.subscriptions["client0"]
+            assert json.loads(unquote(key.split("?options=")[1]))["query"] == {"filter": "status = 'paid'"}
+
+            for i in range(5):
+                server.send("orders", "create", {"id": f"r{i}"})
+
+            first = await anext(events)
+            assert first["record"]["id"] == "r0"
+            assert [event["record"]["id"] for event in await events.batch(3)] == ["r1", "r2", "r3"]
+            assert [event["record"]["id"] for event in await events.batch(3)] == ["r4"]
+            assert await events.batch(3, timeout=0.01) == []
+            assert pb.realtime.subscription_stats[0]["delivered"] == 5
+
+            consumer = asyncio.create_task(anext(events, None))
+            await asyncio.sleep(0)
+            await events.close()
+            assert await consumer is None
+
+        assert pb.realtime.subscription_stats == []
+
+
+async def test_subscribe_many_transmits_once() -> None:
+    server = MockRealtime()
+    pb = server.client()
+    received: list[str] = []
+
+    async def callback(event: RealtimeEvent) -> None:
+        received.append(event["record"]["id"])
+
+    with server.patch():
+        unsubscribe = await pb.realtime.subscribe_many({f"posts/r{i}": callback for i in range(500)})
+        # The connect forces one transmit, the debounced one finds nothing new
+        assert server.transmits == 1
+        assert len(server.subscriptions["client0"]) == 500
+
+        unsubscribes = await asyncio.gather(*(pb.realtime.subscribe(f"tags/t{i}", callback) for i in range(100)))
+        assert server.transmits == 2
+        assert len(server.subscriptions["client0"]) == 600
+
+        server.send("posts/r7", "update", {"id": "r7"})
+        server.send("tags/t3", "update", {"id": "t3"})
+        await asyncio.sleep(0.01)
+        assert received == ["r7", "t3"]
+
+        await unsubscribe()
+        assert server.transmits == 3
+        assert len(server.subscriptions["client0"]) == 100
+
+        await asyncio.gather(*(unsubscribe() for unsubscribe in unsubscribes))
+        assert pb.realtime._connections == []
+
+
+async def test_sharded_connections() -> None:
+    server = MockRealtime()
+    pb = server.client({"realtime_max_topics": 3})
+    received: list[str] = []
+
+    async def callback(event: RealtimeEvent) -> None:
+        received.append(event["record"]["id"])
+
+    def topic_counts() -> list[int]:
+        return sorted(len(server.subscriptions[c.client_id]) for c in pb.realtime._connections if c.client_id)
+
+    with server.patch():
+        unsubscribe = await pb.realtime.subscribe_many({f"posts/r{i}": callback for i in range(7)})
+        assert topic_counts() == [1, 3, 3]
+        assert sum(len(topics) for topics in server.subscriptions.values()) == 7
+
+        for i in range(7):
+            server.send(f"posts/r{i}", "update", {"id": f"r{i}"})
+        await asyncio.sleep(0.01)
+        assert sorted(received) == [f"r{i}" for i in range(7)]
+
+        tags = [await pb.realtime.subscribe(f"tags/t{i}", callback) for i in range(3)]
+        assert topic_counts() == [1, 3, 3, 3]
+
+        # The tags are spread over two connections but fit on one once the posts are gone
+        await unsubscribe()
+        assert len(pb.realtime._connections) == 1
+        assert topic_counts() == [3]
+        await tags[0]()
+        assert topic_counts() == [2]
+
+        received.clear()
+        server.send("tags/t1", "create", {"id": "t1"})
+        server.send("tags/t2", "create", {"id": "t2"})
+        await asyncio.sleep(0.01)
+        assert received == ["t1", "t2"]
+
+        for unsubscribe in tags[1:]:
+            await unsubscribe()
+        assert pb.realtime._connections == []
+
+
+async def test_sharded_swap_keeps_connections() -> None:
+    server = MockRealtime()
+    pb = server.client({"realtime_max_topics": 2})
+
+    async def callback(event: RealtimeEvent) -> None:
+        pass
+
+    with server.patch():
+        unsubscribes = [await pb.realtime.subscribe(f"posts/r{i}", callback) for i in range(3)]
+        connections = list(pb.realtime._connections)
+        assert len(connections) == 2
+
+        # A topic replaced by another in the same debounce window still needs both connections
+        _, unsubscribe = await asyncio.gather(unsubscribes[1](), pb.realtime.subscribe("posts/r3", callback))
+        assert pb.realtime._connections == connections
+        assert len(server.queues) == 2
+        assert sorted(len(topics) for topics in server.subscriptions.values()) == [1, 2]
+
+        for unsubscribe in [unsubscribes[0], unsubscribes[2], unsubscribe]:
+            await unsubscribe()
+
+
+async def test_sharded_move_keeps_delivering(caplog: pytest.LogCaptureFixture) -> None:
+    server = MockRealtime()
+    pb = server.client({"realtime_max_topics": 2})
+    received: list[str] = []
+
+    async def callback(event: RealtimeEvent) -> None:
+        received.append(event["record"]["title"])
+
+    with server.patch():
+        unsubscribes = [await pb.realtime.subscribe(f"posts/r{i}", callback) for i in range(3)]
+        old, new = pb.realtime._connections
+
+        # r1 moves to the other connection once r0 is gone, events flow while that is being transmitted
+        server.transmit_gate = asyncio.Event()
+        moving = asyncio.create_task(unsubscribes[0]())
+        await asyncio.sleep(0.05)
+        server.send("posts/r1", "update", {"id": "r1", "title": "during"})
+        await asyncio.sleep(0.01)
+        assert received == ["during"]
+
+        server.transmit_gate.set()
+        await moving
+        assert pb.realtime._connections == [new]
+        assert not old.running
+        # Retiring a connection is routine, not an error
+        assert [record for record in caplog.records if record.levelno >= logging.ERROR] == []
+        server.send("posts/r1", "update", {"id": "r1", "title": "after"})
+        await asyncio.sleep(0.01)
+        assert received == ["during", "after"]
+
+        for unsubscribe in unsubscribes[1:]:
+            await unsubscribe()
+
+
+async def test_reconnect_catch_up() -> None:
+    server = MockRealtime()
+    pb = server.client({"realtime_backoff": 0.01})
+    received: list[tuple[str, str]] = []
+    filters: list[str] = []
+    reconnected = asyncio.Event()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        filters.append(request.url.params["filter"])
+        assert request.url.params["fields"] == "id,title,updated"
+        # A live event arrives while catching up, it is delivered after the missed ones
+        server.send("posts", "create", {"id": "r4", "updated": "2024-01-01 00:00:04.000Z"})
+        return httpx.Response(200, json={"page": 1, "perPage": 500, "items": [
+            {"id": "r2", "updated": "2024-01-01 00:00:02.000Z"},
+            {"id": "r3", "updated": "2024-01-01 00:00:03.000Z"},
+        ]})  # fmt: skip
+
+    async def callback(event: RealtimeEvent) -> None:
+        received.append((event["action"], event["record"]["id"]))
+
+    async def on_reconnect() -> None:
+        reconnected.set()
+
+    server.handler = handler
+    pb.realtime.on_reconnect(on_reconnect)
+
+    with server.patch():
+        unsubscribe = await pb.collection("posts").subscribe_all(
+            callback, {"catch_up": True, "params": {"fields": "id,title"}}
+        )
+        # Catching up starts from the newest `updated` seen, so it is always fetched
+        [key] = server.subscriptions["client0"]
+        assert json.loads(unquote(key).split("?options=")[1])["query"]["fields"] == "id,title,updated"
+        server.send("posts", "create", {"id": "r1", "updated": "2024-01-01 00:00:01.000Z"})
+        await asyncio.sleep(0.01)
+
+        server.disconnect()
+        await asyncio.wait_for(reconnected.wait(), 1)
+        await asyncio.sleep(0.05)
+
+        assert len(server.queues) == 2
+        assert "updated >= '2024-01-01 00:00:01.000Z'" in filters[0]
+        assert received == [("create", "r1"), ("update", "r2"), ("update", "r3"), ("create", "r4")]
+
+        await unsubscribe()
+
+
+async def test_subscribe_connect_error() -> None:
+    @asynccontextmanager
+    async def unreachable(*args, **kwargs):
+        raise httpx.ConnectError("unreachable")
+        yield
+
+    async def callback(event: RealtimeEvent) -> None:
+        pass
+
+    pb = PocketBase("http://bla.com")
+    with patch("pocketbase.services.realtime.aconnect_sse", unreachable), pytest.raises(httpx.ConnectError):
+        await pb.realtime.subscribe("posts/*", callback)
+    assert pb.realtime.subscription_stats == []
+    await pb.realtime.close()
+
+
+async def test_reconnect_outage() -> None:
+    server = MockRealtime()
+    pb = server.client({"realtime_backoff": 0.01})
+    received: list[str] = []
+    reconnected = asyncio.Event()
+
+    async def callback(event: RealtimeEvent) -> None:
+        received.append(event["record"]["id"])
+
+    async def on_reconnect() -> None:
+        reconnected.set()
+
+    pb.realtime.on_reconnect(on_reconnect)
+
+    with server.patch():
+        unsubscribe = await pb.realtime.subscribe("posts/*", callback)
+
+        # The server cannot be reached for a while, then refuses the resubscribe while it restarts
+        server.connect_errors = [httpx.ConnectTimeout("timed out"), httpx.ConnectError("refused")]
+        server.failing_transmits = 1
+        server.disconnect()
+        await asyncio.wait_for(reconnected.wait(), 1)
+
+        assert len(server.queues) == 3
+        assert server.failing_transmits == 0
+        server.send("posts/*", "create", {"id": "r1"})
+        await asyncio.sleep(0.01)
+        assert received == ["r1"]
+
+        await unsubscribe()
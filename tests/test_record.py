@@ -1,10 +1,14 @@
+import asyncio
+import re
 from datetime import UTC, datetime
 from uuid import uuid4
 
+import httpx
 import pytest
 
 from pocketbase import PocketBase, PocketBaseError
 from pocketbase.models.dtos import CollectionModel
+from pocketbase.models.errors import PocketBaseNotFoundError
 
 
 @pytest.fixture
@@ -218,3 +222,108 @@ async def test_datetime(superuser_client: PocketBase):
     )
     await superuser_client.collection("datetime").create({"when": datetime.now()})
     await superuser_client.collection("datetime").create({"when": datetime.now(tz=UTC)})
+
+
+async def test_get_full_list_concurrent(superuser_client: PocketBase, collection: CollectionModel):
+    col = superuser_client.collection(collection["id"])
+    for i in range(25):
+        await col.create({"title": f"{i:02}"})
+
+    sequential = await col.get_full_list({"batch": 4, "sort": "title"})
+    concurrent = await col.get_full_list({"batch": 4, "sort": "title", "concurrency": 3})
+    assert [r["title"] for r in concurrent] == [f"{i:02}" for i in range(25)]
+    assert concurrent == sequential
+
+
+async def test_iterate(superuser_client: PocketBase, collection: CollectionModel):
+    col = superuser_client.collection(collection["id"])
+    for i in range(10):
+        await col.create({"title": f"{i:02}"})
+
+    pages = [page async for page in col.iterate_pages({"batch": 3, "sort": "title", "prefetch": 2})]
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+
+    titles = [record["title"] async for record in col.iterate({"batch": 5, "sort": "-title"})]
+    assert titles == [f"{i:02}" for i in reversed(range(10))]
+
+
+async def test_cursor_pagination(superuser_client: PocketBase, collection: CollectionModel):
+    col = superuser_client.collection(collection["id"])
+    for i in range(10):
+        await col.create({"title": f"{i % 3}"})
+
+    by_id = await col.get_full_list({"sort": "id"})
+    assert await col.get_full_list({"batch": 3, "cursor": "id"}) == by_id
+
+    pages = [page async for page in col.iterate_pages({"batch": 4, "cursor": "-title,id", "filter": "title != '1'"})]
+    titles = [record["title"] for page in pages for record in page]
+    assert [len(page) for page in pages] == [4, 3]
+    assert titles == ["2", "2", "2", "0", "0", "0", "0"]
+
+
+async def test_record_cache(
+    superuser_client: PocketBase, collection: CollectionModel, client_url: str, superuser: tuple[str, str]
+):
+    col = superuser_client.collection(collection["id"])
+    record = await col.create({"title": "a"})
+    await col.enable_cache(max_size=10, ttl=None)
+
+    assert await col.get_one(record["id"]) == record
+    assert await col.get_one(record["id"]) == record
+    assert col.cache_stats == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+    # Changes made through another client reach the cache through realtime events
+    other = PocketBase(client_url)
+    await other.collection("_superusers").auth.with_password(*superuser)
+    await other.collection(collection["id"]).update(record["id"], {"title": "b"})
+    await asyncio.sleep(0.2)
+    assert (await col.get_one(record["id"]))["title"] == "b"
+    assert col.cache_stats["hits"] == 2
+
+    with pytest.raises(PocketBaseNotFoundError):
+        await col.get_one("doesnotexist123")
+    with pytest.raises(PocketBaseNotFoundError):
+        await col.get_one("doesnotexist123")
+    assert col.cache_stats["hits"] == 3
+
+    await col.disable_cache()
+    assert col.cache_stats is None
+
+
+async def test_loader(superuser_client: PocketBase, collection: CollectionModel):
+    col = superuser_client.collection(collection["id"])
+    records = [await col.create({"title": f"{i}"}) for i in range(5)]
+
+    loader = col.loader()
+    loaded = await asyncio.gather(*(loader.load(r["id"]) for r in reversed(records)), loader.load(records[0]["id"]))
+    assert loaded == [*reversed(records), records[0]]
+
+    with pytest.raises(PocketBaseNotFoundError) as exc:
+        await asyncio.gather(loader.load(records[0]["id"]), loader.load("doesnotexist123"))
+    assert exc.value.status == 404
+
+    expanded = await col.loader({"params": {"fields": "id"}}).load_many([r["id"] for r in records])
+    assert expanded == [{"id": r["id"]} for r in records]
+
+
+async def test_loader_fields_and_errors():
+    requested: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.params["fields"])
+        if "broken" in request.url.params["filter"]:
+            return httpx.Response(200, content=b"not json")
+        ids = re.findall(r"id='(\w+)'", request.url.params["filter"])
+        return httpx.Response(200, json={"page": 1, "perPage": 10, "items": [{"id": i, "title": i} for i in ids]})
+
+    pb = PocketBase("http://bla.com")
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+    loader = pb.collection("test").loader({"params": {"fields": "title"}})
+
+    # The id is fetched to match records to callers, even when not requested
+    assert await loader.load_many(["a", "b"]) == [{"id": "a", "title": "a"}, {"id": "b", "title": "b"}]
+    assert requested == ["title,id"]
+
+    # A failure after the request still reaches every caller
+    with pytest.raises(PocketBaseError):
+        await asyncio.wait_for(loader.load_many(["broken", "c"]), 1)
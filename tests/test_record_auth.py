@@ -1,5 +1,10 @@
+import asyncio
+import base64
+import json
+from datetime import UTC, datetime
 from uuid import uuid4
 
+import httpx
 import pytest
 
 from pocketbase import PocketBase
@@ -55,3 +60,90 @@ async def test_list_auth_methods(client: PocketBase):
     assert isinstance(val["oauth2"]["enabled"], bool)
     assert isinstance(val["oauth2"]["providers"], list)
     assert isinstance(val["mfa"]["enabled"], bool)
+
+
+def make_token(expires_in: float) -> str:
+    payload = json.dumps({"exp": datetime.now(tz=UTC).timestamp() + expires_in}).encode()
+    return f"header.{base64.urlsafe_b64encode(payload).decode().rstrip('=')}.signature"
+
+
+def mock_client(refresh_expires_in: float, **kwargs) -> tuple[PocketBase, list[str]]:
+    requests: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if request.url.path.endswith("/auth-refresh"):
+            await asyncio.sleep(0.05)
+            record = {"id": "a", "collectionName": "users"}
+            return httpx.Response(200, json={"token": make_token(refresh_expires_in), "record": record})
+        return httpx.Response(200, json={"code": 200, "message": "", "data": {}})
+
+    pb = PocketBase("http://bla.com", **kwargs)
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+    return pb, requests
+
+
+async def test_concurrent_requests_share_one_refresh():
+    pb, requests = mock_client(3600)
+    pb._inners.auth.set_user({"token": make_token(30), "record": {"id": "a", "collectionName": "users"}})
+
+    await asyncio.gather(*(pb.health.check() for _ in range(10)))
+    assert requests.count("/api/collections/users/auth-refresh") == 1
+    assert requests.count("/api/health") == 10
+
+
+async def test_refresh_with_concurrency_limit():
+    pb, requests = mock_client(3600, rate_limits={"/api/collections*": {"concurrency": 1}})
+    pb._inners.auth.set_user({"token": make_token(30), "record": {"id": "a", "collectionName": "users"}})
+
+    # The refresh needs the only slot of the route, the requests waiting for it must not hold that slot
+    await asyncio.wait_for(asyncio.gather(*(pb.collection("posts").get_one("a") for _ in range(20))), 2)
+    assert requests.count("/api/collections/users/auth-refresh") == 1
+    assert requests.count("/api/collections/posts/records/a") == 20
+
+
+async def test_auto_refresh():
+    pb, requests = mock_client(3600, auto_refresh=True)
+    pb._inners.auth._auto_refresh_lead_ = 60.3
+    pb._inners.auth.set_user({"token": make_token(60.5), "record": {"id": "a", "collectionName": "users"}})
+
+    await asyncio.sleep(0.5)
+    assert requests == ["/api/collections/users/auth-refresh"]
+
+    # The refreshed token is far from expiry, requests do not wait for a refresh
+    await pb.health.check()
+    assert requests == ["/api/collections/users/auth-refresh", "/api/health"]
+    pb._inners.auth.clean()
+
+
+async def test_as_user_shares_client():
+    tokens: list[str | None] = []
+    refreshed = make_token(3600)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        tokens.append(request.headers.get("Authorization"))
+        if request.url.path.endswith("/auth-refresh"):
+            return httpx.Response(200, json={"token": refreshed, "record": {"id": "b", "collectionName": "users"}})
+        return httpx.Response(200, json={"code": 200, "message": "", "data": {}})
+
+    pb = PocketBase("http://bla.com")
+    pb._inners.client = httpx.AsyncClient(base_url="http://bla.com", transport=httpx.MockTransport(handler))
+    alice_token, bob_token = make_token(3600), make_token(30)
+    alice = pb.as_user({"token": alice_token, "record": {"id": "a", "collectionName": "users"}})
+    bob = pb.as_user({"token": bob_token, "record": {"id": "b", "collectionName": "users"}})
+
+    async def check_as(identity) -> None:
+        with identity:
+            await asyncio.sleep(0)
+            await pb.health.check()
+
+    await asyncio.gather(check_as(alice), check_as(bob), pb.health.check())
+    assert sorted(tokens, key=str) == sorted([alice_token, None, bob_token, refreshed], key=str)
+
+    # The refresh updated bob only, requests outside `with` remain anonymous
+    assert bob.store.token == refreshed
+    assert alice.store.token == alice_token
+    assert pb._inners.auth.token is None
+    with bob:
+        assert pb._inners.auth is bob.store
+        assert pb._inners.auth.identity == (None, "b")